@@ -20,13 +20,25 @@ class DelayModel(ABC):
         pass
 
 
+class ErrorModel(ABC):
+    @abstractmethod
+    def is_received(self, sinr_db: float, packet_size: int) -> bool:
+        pass
+
+
 class AntennaModel(ABC):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class SpectrumSignalParameters:
     duration: float | None = None
     tx_phy: None = None
     tx_power: float | None = None  # dBm
     tx_antenna: AntennaModel | None = None
+
+    def reset(self):
+        self.duration = None
+        self.tx_phy = None
+        self.tx_power = None
+        self.tx_antenna = None
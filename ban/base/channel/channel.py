@@ -1,12 +1,16 @@
+import bisect
 import logging
+import math
 
 from simpy import Environment
 
-from ban.base.channel.base_channel import DelayModel, LossModel, SpectrumSignalParameters
+from ban.base.channel.base_channel import DelayModel, LossModel
+from ban.base.channel.loss_model import BodyPathLossModel
 from ban.base.helper.mobility_helper import MobilityHelper
 from ban.base.logging.log import SeoungSimLogger
 from ban.base.mobility import MobilityModel
 from ban.base.packet import Packet
+from ban.config.JSONConfig import JSONConfig
 
 
 class Channel:
@@ -20,6 +24,27 @@ class Channel:
 
         self.mob_helper: MobilityHelper = mob_helper
 
+        # busy-interval index: intervals during which receivers sense a transmission, sorted by start time,
+        # with the sender and TX power of each transmission for the interference at a receiver,
+        # and the receivers the frame reached with their RX power (filled by start_tx at the interval start)
+        self.busy_starts: list[float] = list()
+        self.busy_ends: list[float] = list()
+        self.busy_senders: list = list()
+        self.busy_tx_powers: list[float] = list()
+        self.busy_receivers: list[dict] = list()
+        self.pending_receivers: dict[int, dict] = dict()    # id(TX packet) -> receivers of its interval
+        self.max_busy_duration: float = 0.0
+
+        self.loss_model: LossModel | None = None
+        if bool(JSONConfig.get_config("use_path_loss")):
+            a, b, sigma = (JSONConfig.get_config(key) for key in ("path_loss_a", "path_loss_b", "path_loss_sigma"))
+            self.loss_model = BodyPathLossModel(
+                a=6.6 if a is None else float(a),
+                b=36.1 if b is None else float(b),
+                sigma=3.8 if sigma is None else float(sigma),
+                seed=JSONConfig.get_config("path_loss_seed"),
+            )
+
 
     def add_phy_list(self, phy):
         self.phy_list.append(phy)
@@ -30,8 +55,11 @@ class Channel:
     def get_env(self):
         return self.env
 
-    def set_loss_model(self, loss_model: LossModel):
-        return
+    def set_loss_model(self, loss_model: LossModel | None):
+        self.loss_model = loss_model
+
+    def get_loss_model(self) -> LossModel | None:
+        return self.loss_model
 
     def set_delay_model(self, delay_model: DelayModel):
         return
@@ -39,43 +67,146 @@ class Channel:
     def set_tx_packet(self, tx_packet):
         self.tx_packet = tx_packet
 
-    def start_tx(self, event):
+        # receivers sense the frame while it is sent (see start_tx)
+        spec_tx_params = tx_packet.get_spectrum_tx_params()
+        self.pending_receivers[id(tx_packet)] = self.add_busy_interval(
+            self.env.now, self.env.now + spec_tx_params.duration, spec_tx_params.tx_phy, spec_tx_params.tx_power
+        )
+
+    def add_busy_interval(self, start: float, end: float, sender=None, tx_power: float | None = None) -> dict:
+        """
+        :return: receivers of the interval (BanPhy -> RX power in dBm), to be filled when the frame reaches them
+        """
+        receivers = dict()
+
+        index = bisect.bisect_right(self.busy_starts, start)
+        self.busy_starts.insert(index, start)
+        self.busy_ends.insert(index, end)
+        self.busy_senders.insert(index, sender)
+        self.busy_tx_powers.insert(index, tx_power)
+        self.busy_receivers.insert(index, receivers)
+        self.max_busy_duration = max(self.max_busy_duration, end - start)
+
+        # intervals that ended before now can not overlap any future CCA window or reception
+        expired = bisect.bisect_left(self.busy_starts, self.env.now - self.max_busy_duration)
+        if expired > 0:
+            del self.busy_starts[:expired]
+            del self.busy_ends[:expired]
+            del self.busy_senders[:expired]
+            del self.busy_tx_powers[:expired]
+            del self.busy_receivers[:expired]
+
+        return receivers
+
+    def is_idle(self, start: float, end: float, receiver=None) -> bool:
+        """
+        check whether no registered transmission overlaps [start, end)
+        :param start: window start time
+        :param end: window end time
+        :param receiver: BanPhy sensing the channel, only frames that reach it (not sent by it, not blocked by
+                         the mobility table, not arriving while it is off) and that its CCA detects keep it busy.
+                         A frame whose interval has not started yet counts as long as its receivers are unknown.
+        :return: True if the channel is idle during the window
+        """
+        index = bisect.bisect_left(self.busy_starts, end)  # intervals starting before the window ends
+
+        while index > 0:
+            index -= 1
+            if self.busy_starts[index] + self.max_busy_duration <= start:
+                break
+            if self.busy_ends[index] <= start:
+                continue
+
+            if receiver is not None:
+                if self.busy_senders[index] is receiver:
+                    continue
+
+                if self.busy_starts[index] < self.env.now:
+                    rx_power = self.busy_receivers[index].get(receiver)
+                    if rx_power is None or not receiver.senses(rx_power):
+                        continue
+
+            return False
+
+        return True
+
+    def get_rx_power(self, tx_power: float, sender, receiver, shadowing: bool = True) -> float:
+        """
+        :param tx_power: dBm
+        :param sender: BanPhy of the sender
+        :param receiver: BanPhy of the receiver
+        :param shadowing: False for the mean path loss
+        :return: power at the receiver (dBm)
+        """
+        if self.loss_model is None:
+            return tx_power
+
+        if shadowing:
+            return self.loss_model.calculate_rx_power_friis(tx_power, sender.get_mobility(), receiver.get_mobility())
+
+        return tx_power - self.loss_model.get_mean_path_loss(sender.get_mobility(), receiver.get_mobility())
+
+    def get_interference_power(self, receiver, sender, start: float, end: float) -> float:
+        """
+        sum of the (mean) power of the other transmissions the receiver senses during [start, end)
+        :param receiver: BanPhy receiving the frame
+        :param sender: BanPhy that sent the frame, its own transmission is not interference
+        :return: mW
+        """
+        interference = 0.0
+        index = bisect.bisect_left(self.busy_starts, end)  # intervals starting before the window ends
+
+        while index > 0:
+            index -= 1
+            if self.busy_starts[index] + self.max_busy_duration <= start:
+                break
+
+            interferer = self.busy_senders[index]
+            if self.busy_ends[index] <= start or interferer is None or interferer is sender or interferer is receiver:
+                continue
+
+            rx_power = self.get_rx_power(self.busy_tx_powers[index], interferer, receiver, shadowing=False)
+            interference += math.pow(10.0, rx_power / 10.0)
+
+        return interference
+
+    def start_tx(self, tx_packet: Packet):
+        receivers = self.pending_receivers.pop(id(tx_packet), dict())
+
+        # each transmission brings its own packet, frames of overlapping transmissions are not mixed up
         for receiver in self.phy_list:
-            if receiver == self.tx_packet.get_spectrum_tx_params().tx_phy:
+            if receiver == tx_packet.get_spectrum_tx_params().tx_phy:
                 # if the sender is the receiver, skip the transmission
                 continue
 
-            if self.tx_packet.get_mac_header().sender_id != 99:
-                time_slot = self.tx_packet.get_mac_header().time_slot_index
-
-                assert time_slot is not None
+            if receiver.is_trx_off():
+                # sleeping radios are not in the receive path
+                continue
 
-                if not self.mob_helper.can_transaction(self.tx_packet.get_mac_header().sender_id, time_slot):
+            # frames sent in the random access phase have no time slot
+            time_slot = tx_packet.get_mac_header().time_slot_index
+            if tx_packet.get_mac_header().sender_id != 99 and time_slot is not None:
+                if not self.mob_helper.can_transaction(tx_packet.get_mac_header().sender_id, time_slot):
                     Channel.logger.log(
                         sim_time=self.env.now,
-                        msg=f"{self.mob_helper.current_phase.name} not allows transaction, dropping packet from: {self.tx_packet.get_mac_header().sender_id} to: {self.tx_packet.get_mac_header().recipient_id}",
+                        msg=f"{self.mob_helper.current_phase.name} not allows transaction, dropping packet from: {tx_packet.get_mac_header().sender_id} to: {tx_packet.get_mac_header().recipient_id}",
                         level=logging.INFO
                     )
                     continue
 
             
-            # 수신 패킷 설정
-            packet_copy = self.tx_packet.copy()
-
-            spec_rx_params = SpectrumSignalParameters()
-            spec_rx_params.duration = packet_copy.get_spectrum_tx_params().duration
-            spec_rx_params.tx_power = packet_copy.get_spectrum_tx_params().tx_power
-            spec_rx_params.tx_phy = packet_copy.get_spectrum_tx_params().tx_phy
-            spec_rx_params.tx_antenna = packet_copy.get_spectrum_tx_params().tx_antenna
+            # 수신 패킷 설정 (copy()가 수신측 spectrum parameter를 따로 갖도록 복사함)
+            packet_copy = tx_packet.copy()
 
-            # 수신 패킷 설정 완료
-            packet_copy.set_spectrum_tx_params(spec_rx_params)
-            receiver.set_rx_packet(packet_copy)
+            # 수신측 전력: 경로 손실(shadowing 포함) 반영
+            spec_rx_params = packet_copy.get_spectrum_tx_params()
+            spec_rx_params.tx_power = self.get_rx_power(spec_rx_params.tx_power, spec_rx_params.tx_phy, receiver)
+            receivers[receiver] = spec_rx_params.tx_power
 
             # print("DEBUG: rx packet rx_params set to", packet_copy.get_spectrum_tx_params().tx_power)
 
-            # 이벤트에 수신 이벤트 등록
+            # 이벤트에 수신 이벤트 등록, 각 이벤트가 자기 수신 패킷을 갖고 감
             event = self.env.event()
             event._ok = True
-            event.callbacks.append(receiver.start_rx)
+            event.callbacks.append(lambda _, phy=receiver, rx_packet=packet_copy: phy.start_rx(rx_packet))
             self.env.schedule(event, priority=0, delay=0)
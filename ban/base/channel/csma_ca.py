@@ -1,23 +1,31 @@
+import math
 import random
-from enum import Enum
+from dataclasses import dataclass
+
+import numpy as np
 
 from ban.base.utils import microseconds
+from ban.config.JSONConfig import JSONConfig
+from ban.device.mac_header import BanMacState
+from ban.device.phy import BanPhyTRxState
+
+
+@dataclass
+class BanSuperframe:
+    beacon_time: float = 0.0    # absolute time the beacon was received
+    rap_start: float = 0.0      # absolute start of the random access phase (CAP)
+    rap_end: float = 0.0        # absolute end of the random access phase (CAP)
+    backoff_slot: float = 0.0   # backoff slot length (seconds), aligned to the RAP start
 
+    def get_time_to_next_boundary(self, time: float) -> float:
+        if time <= self.rap_start:
+            return self.rap_start - time
 
-class BanPhyTRxState(Enum):
-    IEEE_802_15_6_PHY_BUSY = 0
-    IEEE_802_15_6_PHY_BUSY_RX = 1
-    IEEE_802_15_6_PHY_BUSY_TX = 2
-    IEEE_802_15_6_PHY_FORCE_TRX_OFF = 3
-    IEEE_802_15_6_PHY_IDLE = 4
-    IEEE_802_15_6_PHY_INVALID_PARAMETER = 5
-    IEEE_802_15_6_PHY_RX_ON = 6
-    IEEE_802_15_6_PHY_SUCCESS = 7
-    IEEE_802_15_6_PHY_TRX_OFF = 8
-    IEEE_802_15_6_PHY_TX_ON = 9
-    IEEE_802_15_6_PHY_UNSUPPORTED_ATTRIBUTE = 10
-    IEEE_802_15_6_PHY_READ_ONLY = 11
-    IEEE_802_15_6_PHY_UNSPECIFIED = 12
+        slots = math.ceil((time - self.rap_start) / self.backoff_slot - 1e-9)
+        return max(self.rap_start + slots * self.backoff_slot - time, 0.0)
+
+    def fits_before_rap_end(self, time: float, duration: float) -> bool:
+        return self.rap_start <= time and time + duration <= self.rap_end
 
 
 class CsmaCa:
@@ -35,6 +43,13 @@ class CsmaCa:
         self.__unit_backoff_period = 20   # number of symbols per CSMA/CA time unit, default 20 symbols
         self.__cca_request_running = False  # flag indicating that the PHY is currently running a CCA
 
+        # one-shot mode: resolve the whole backoff sequence at once against the channel's busy-interval index
+        self.__is_one_shot = bool(JSONConfig.get_config("use_one_shot_csma_ca"))
+        self.__rng: np.random.Generator | None = None
+        self.__cca_start = 0.0  # start of the CCA window that found the channel idle (one-shot mode)
+
+        self.__superframe: BanSuperframe | None = None  # slotted mode: current superframe from the last beacon
+
     def set_env(self, env):
         self.__env = env
 
@@ -59,6 +74,12 @@ class CsmaCa:
     def is_unslotted_csma_ca(self):
         return not self.__is_slotted
 
+    def set_one_shot_csma_ca(self, one_shot: bool):
+        self.__is_one_shot = one_shot
+
+    def is_one_shot_csma_ca(self):
+        return self.__is_one_shot
+
     def set_mac_min_backoff_exp(self, min_backoff_exp):
         self.__mac_min_backoff_exp = min_backoff_exp
 
@@ -83,9 +104,33 @@ class CsmaCa:
     def get_unit_backoff_period(self):
         return self.__unit_backoff_period
 
-    def get_time_to_next_slot(self):
-        # TODO: calculate the offset to the next slot
-        return 0
+    def set_superframe(self, superframe: BanSuperframe | None):
+        self.__superframe = superframe
+
+    def get_superframe(self) -> BanSuperframe | None:
+        return self.__superframe
+
+    def get_backoff_slot_length(self) -> float:
+        # unit backoff period in seconds
+        return self.get_unit_backoff_period() / self.__mac.get_phy().get_data_or_symbol_rate(False)
+
+    def get_time_to_next_slot(self, time: float | None = None):
+        if self.__superframe is None:
+            return 0
+
+        return self.__superframe.get_time_to_next_boundary(self.__env.now if time is None else time)
+
+    def fits_in_rap(self, time: float) -> bool:
+        """
+        check whether the CCAs, the frame and its ACK fit before the end of the random access phase
+        :param time: time the first CCA starts
+        :return:
+        """
+        if self.__superframe is None:
+            return True
+
+        cca_time = self.__mac.get_phy().get_cca_time() * self.__cw
+        return self.__superframe.fits_before_rap_end(time, cca_time + self.__mac.get_transaction_time(self.__mac.tx_packet))
 
     def start(self):
         self.__nb = 0
@@ -95,19 +140,19 @@ class CsmaCa:
                 self.__be = min(2, self.__mac_min_backoff_exp)
             else:
                 self.__be = self.__mac_min_backoff_exp
-            # TODO: for slotted, locate backoff period boundary, i.e., delay to the next slot boundary
+            # slotted: start the backoff at the next backoff period boundary
             backoff_boundary = self.get_time_to_next_slot()
 
             event = self.__env.event()
             event._ok = True
-            event.callbacks.append(self.random_backoff_delay)
+            event.callbacks.append(self.resolve_backoffs if self.__is_one_shot else self.random_backoff_delay)
             self.__env.schedule(event, priority=0, delay=backoff_boundary)
         else:
             self.__be = self.__mac_min_backoff_exp
 
             event = self.__env.event()
             event._ok = True
-            event.callbacks.append(self.random_backoff_delay)
+            event.callbacks.append(self.resolve_backoffs if self.__is_one_shot else self.random_backoff_delay)
             self.__env.schedule(event, priority=0, delay=0)
 
     def cancel(self):
@@ -133,22 +178,17 @@ class CsmaCa:
             self.__env.schedule(event, priority=0, delay=rando__backoff)
 
     def can_proceed(self, event):
-        can_proceed = True
+        backoff_boundary = self.get_time_to_next_slot()
+        can_proceed = self.fits_in_rap(self.__env.now + backoff_boundary)
 
         if can_proceed is True:
-            backoff_boundary = self.get_time_to_next_slot()
-
             event = self.__env.event()
             event._ok = True
             event.callbacks.append(self.request_cca)
             self.__env.schedule(event, priority=0, delay=backoff_boundary)
         else:
-            next_cap = 0
-
-            event = self.__env.event()
-            event._ok = True
-            event.callbacks.append(self.random_backoff_delay)
-            self.__env.schedule(event, priority=0, delay=next_cap)
+            # the next CAP is only known from the next beacon
+            self.__mac.set_mac_state(BanMacState.CHANNEL_ACCESS_FAILURE)
 
     def request_cca(self, event):
         self.__cca_request_running = True
@@ -186,6 +226,74 @@ class CsmaCa:
                     event.callbacks.append(self.random_backoff_delay)
                     self.__env.schedule(event, priority=0, delay=0)
 
+    def get_rng(self) -> np.random.Generator:
+        if self.__rng is None:
+            seed = JSONConfig.get_config("csma_ca_seed")
+            seed = (42 if seed is None else int(seed)) + self.__mac.get_mac_params().node_id
+            self.__rng = np.random.default_rng(seed)
+
+        return self.__rng
+
+    def resolve_backoffs(self, event):
+        """
+        one-shot CSMA/CA: draw the remaining backoff sequence at once and check each CCA window against the
+        channel's busy-interval index, so only the final outcome (CHANNEL_IDLE or CHANNEL_ACCESS_FAILURE) is scheduled
+        """
+        phy = self.__mac.get_phy()
+        channel = phy.get_channel()
+
+        symbol_rate = phy.get_data_or_symbol_rate(False)  # symbols per second
+        unit_backoff = self.get_unit_backoff_period() / symbol_rate  # seconds
+        cca_time = phy.get_cca_time() * (self.__cw if self.is_slotted_csma_ca() is True else 1)
+
+        attempts = self.__mac_max_csma_backoffs - self.__nb + 1
+        exponents = np.minimum(self.__be + np.arange(attempts), self.__mac_max_backoff_exp)
+        backoffs = self.get_rng().uniform(0, np.power(2.0, exponents - 1) + 1) * unit_backoff
+
+        now = self.__env.now
+        for backoff in backoffs.tolist():
+            cca_start = now + backoff
+            if self.is_slotted_csma_ca() is True:
+                cca_start += self.get_time_to_next_slot(cca_start)
+
+                if not self.fits_in_rap(cca_start):
+                    break
+            now = cca_start + cca_time
+
+            if channel.is_idle(cca_start, now, receiver=phy):
+                self.__cca_start = cca_start
+
+                event = self.__env.event()
+                event._ok = True
+                event.callbacks.append(self.confirm_channel_idle)
+                self.__env.schedule(event, priority=0, delay=now - self.__env.now)
+                return
+
+            self.__be = min(self.__be + 1, self.__mac_max_backoff_exp)
+            self.__nb += 1
+
+        # no channel found before the retries or the RAP ran out so cannot send packet
+        event = self.__env.event()
+        event._ok = True
+        event.callbacks.append(lambda _: self.__mac.set_mac_state(BanMacState.CHANNEL_ACCESS_FAILURE))
+        self.__env.schedule(event, priority=0, delay=now - self.__env.now)
+
+    def confirm_channel_idle(self, event):
+        # a transmission registered after the resolution may overlap the last CCA window
+        phy = self.__mac.get_phy()
+        if phy.get_channel().is_idle(self.__cca_start, self.__env.now, receiver=phy):
+            self.__mac.set_mac_state(BanMacState.CHANNEL_IDLE)
+            return
+
+        if self.is_slotted_csma_ca() is True:
+            self.__cw = 2
+        self.__be = min(self.__be + 1, self.__mac_max_backoff_exp)
+        self.__nb += 1
+        if self.__nb > self.__mac_max_csma_backoffs:
+            self.__mac.set_mac_state(BanMacState.CHANNEL_ACCESS_FAILURE)
+        else:
+            self.resolve_backoffs(event)
+
     def get_nb(self):
         # return the number of CSMA retries
         return self.__nb
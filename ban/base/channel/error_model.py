@@ -0,0 +1,110 @@
+import math
+from enum import Enum
+
+import numpy as np
+
+from ban.base.channel.base_channel import ErrorModel
+
+
+class BanModulation(Enum):
+    BPSK = 0
+    OQPSK = 1
+    ASK = 2
+
+
+class BanErrorModel(ErrorModel):
+    """
+    SINR based packet error model backed by precomputed PER lookup tables.
+
+    A table holds the packet error rate of one (modulation, packet size) pair over a fine SINR grid, so a reception
+    costs one interpolated lookup and one pre-drawn uniform number instead of evaluating a BER formula per packet.
+    """
+    # SINR grid (dB)
+    SINR_MIN_DB = -10.0
+    SINR_MAX_DB = 30.0
+    SINR_STEP_DB = 0.01
+    sinr_grid: np.ndarray = SINR_MIN_DB + np.arange(int(round((SINR_MAX_DB - SINR_MIN_DB) / SINR_STEP_DB)) + 1) * SINR_STEP_DB
+
+    # number of uniform numbers drawn at once for the Bernoulli trials
+    DRAW_BLOCK_SIZE = 4096
+
+    # PER tables shared by every model: (modulation, packet size) -> (ndarray, list)
+    per_tables: dict[tuple[BanModulation, int], tuple[np.ndarray, list[float]]] = dict()
+
+    def __init__(self, modulation: BanModulation, seed: int | None = None):
+        self.__modulation = modulation
+        self.__rng = np.random.default_rng(seed)
+        self.__uniforms: list[float] = list()
+        self.__uniform_index = 0
+        self.__inv_step = 1.0 / BanErrorModel.SINR_STEP_DB
+        self.__last_index = len(BanErrorModel.sinr_grid) - 1
+
+    @staticmethod
+    def calc_ber(modulation: BanModulation, sinr_db: np.ndarray) -> np.ndarray:
+        """
+        bit error rate over AWGN, the SINR is taken as Eb/N0 (after despreading)
+        :param modulation: BanModulation
+        :param sinr_db: SINR in dB
+        :return: BER
+        """
+        snr = np.power(10.0, np.asarray(sinr_db, dtype=np.float64) / 10.0)
+
+        if modulation == BanModulation.BPSK or modulation == BanModulation.OQPSK:
+            # coherent BPSK and OQPSK have the same BER per bit
+            return 0.5 * np.vectorize(math.erfc)(np.sqrt(snr))
+        elif modulation == BanModulation.ASK:
+            # non-coherent on-off keying
+            return 0.5 * np.exp(-snr / 2.0)
+
+        raise Exception(f"unsupported modulation: {modulation}")
+
+    @staticmethod
+    def get_per_table(modulation: BanModulation, packet_size: int) -> tuple[np.ndarray, list[float]]:
+        key = (modulation, packet_size)
+        table = BanErrorModel.per_tables.get(key)
+
+        if table is None:
+            ber = BanErrorModel.calc_ber(modulation, BanErrorModel.sinr_grid)
+            bits = packet_size * 8
+
+            # PER = 1 - (1 - BER)^bits
+            per = -np.expm1(bits * np.log1p(-ber))
+            table = (per, per.tolist())
+            BanErrorModel.per_tables[key] = table
+
+        return table
+
+    def get_per(self, sinr_db: float, packet_size: int) -> float:
+        per = BanErrorModel.get_per_table(self.__modulation, packet_size)[1]
+
+        position = (sinr_db - BanErrorModel.SINR_MIN_DB) * self.__inv_step
+        if position <= 0:
+            return per[0]
+        if position >= self.__last_index:
+            return per[self.__last_index]
+
+        index = int(position)
+        return per[index] + (per[index + 1] - per[index]) * (position - index)
+
+    def get_per_array(self, sinr_db: np.ndarray, packet_size: int) -> np.ndarray:
+        per = BanErrorModel.get_per_table(self.__modulation, packet_size)[0]
+        return np.interp(sinr_db, BanErrorModel.sinr_grid, per)
+
+    def is_received(self, sinr_db: float, packet_size: int) -> bool:
+        per = self.get_per(sinr_db, packet_size)
+
+        if per <= 0.0:
+            return True
+
+        if self.__uniform_index == len(self.__uniforms):
+            self.__uniforms = self.__rng.random(BanErrorModel.DRAW_BLOCK_SIZE).tolist()
+            self.__uniform_index = 0
+
+        uniform = self.__uniforms[self.__uniform_index]
+        self.__uniform_index += 1
+
+        return uniform >= per
+
+    def is_received_array(self, sinr_db: np.ndarray, packet_size: int) -> np.ndarray:
+        per = self.get_per_array(sinr_db, packet_size)
+        return self.__rng.random(per.shape) >= per
@@ -0,0 +1,83 @@
+import math
+
+import numpy as np
+
+from ban.base.channel.base_channel import LossModel
+from ban.base.mobility import MobilityModel, BodyPosition
+
+
+class BodyPathLossModel(LossModel):
+    """
+    On-body path loss of the IEEE 802.15.6 channel model CM3: PL(d) = a * log10(d) + b + N(0, sigma^2), d in mm.
+
+    The defaults are the 2.4 GHz hospital room fit (a = 6.6, b = 36.1, sigma = 3.8 dB).
+    Body positions are placed on a front view of a standing body, the distance between two devices is the straight
+    line between their positions. Shadowing is drawn per reception, in blocks like the error model.
+    """
+    # (x, y) of each body position, mm, the coordinator (BODY) sits at the center of the torso
+    POSITIONS_MM: dict[BodyPosition, tuple[float, float]] = {
+        BodyPosition.HEAD: (0.0, 550.0),
+        BodyPosition.LEFT_UPPER_TORSO: (-100.0, 150.0),
+        BodyPosition.LEFT_LOWER_TORSO: (-100.0, -150.0),
+        BodyPosition.RIGHT_UPPER_TORSO: (100.0, 150.0),
+        BodyPosition.RIGHT_LOWER_TORSO: (100.0, -150.0),
+        BodyPosition.LEFT_SHOULDER: (-200.0, 300.0),
+        BodyPosition.RIGHT_SHOULDER: (200.0, 300.0),
+        BodyPosition.LEFT_ELBOW: (-250.0, 0.0),
+        BodyPosition.LEFT_WRIST: (-300.0, -250.0),
+        BodyPosition.RIGHT_ELBOW: (250.0, 0.0),
+        BodyPosition.RIGHT_WRIST: (300.0, -250.0),
+        BodyPosition.LEFT_KNEE: (-100.0, -750.0),
+        BodyPosition.LEFT_ANKLE: (-100.0, -1200.0),
+        BodyPosition.RIGHT_KNEE: (100.0, -750.0),
+        BodyPosition.RIGHT_ANKLE: (100.0, -1200.0),
+        BodyPosition.BODY: (0.0, 0.0),
+    }
+    MIN_DISTANCE_MM = 10.0
+
+    # number of shadowing samples drawn at once
+    DRAW_BLOCK_SIZE = 4096
+
+    def __init__(self, a: float = 6.6, b: float = 36.1, sigma: float = 3.8, seed: int | None = None):
+        self.a = a
+        self.b = b
+        self.sigma = sigma
+
+        self.__rng = np.random.default_rng(seed)
+        self.__shadowing: list[float] = list()
+        self.__shadowing_index = 0
+        self.__mean_path_loss: dict[tuple[BodyPosition, BodyPosition], float] = dict()
+
+    def get_distance(self, a: BodyPosition, b: BodyPosition) -> float:
+        (ax, ay), (bx, by) = BodyPathLossModel.POSITIONS_MM[a], BodyPathLossModel.POSITIONS_MM[b]
+        return max(math.hypot(ax - bx, ay - by), BodyPathLossModel.MIN_DISTANCE_MM)
+
+    def get_mean_path_loss(self, sender_mobility: MobilityModel, receiver_mobility: MobilityModel) -> float:
+        """path loss without shadowing (dB), 0 if a device has no position"""
+        if sender_mobility is None or receiver_mobility is None:
+            return 0.0
+
+        key = (sender_mobility.get_body_position(), receiver_mobility.get_body_position())
+        path_loss = self.__mean_path_loss.get(key)
+
+        if path_loss is None:
+            path_loss = self.a * math.log10(self.get_distance(*key)) + self.b
+            self.__mean_path_loss[key] = path_loss
+
+        return path_loss
+
+    def calculate_path_loss(self, sender_mobility: MobilityModel, receiver_mobility: MobilityModel) -> float:
+        if sender_mobility is None or receiver_mobility is None:
+            return 0.0
+
+        if self.__shadowing_index == len(self.__shadowing):
+            self.__shadowing = self.__rng.normal(0.0, self.sigma, BodyPathLossModel.DRAW_BLOCK_SIZE).tolist()
+            self.__shadowing_index = 0
+
+        shadowing = self.__shadowing[self.__shadowing_index]
+        self.__shadowing_index += 1
+
+        return self.get_mean_path_loss(sender_mobility, receiver_mobility) + shadowing
+
+    def calculate_rx_power_friis(self, tx_power_dbm: float, a: MobilityModel, b: MobilityModel) -> float:
+        return tx_power_dbm - self.calculate_path_loss(a, b)
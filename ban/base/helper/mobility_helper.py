@@ -5,6 +5,7 @@ import math
 import random
 from typing import List
 
+import numpy as np
 import simpy
 
 from ban.base.mobility import BodyPosition, MobilityModel
@@ -75,6 +76,17 @@ class MobilityHelper:
     def can_transaction(self, sender_id: int, time_slot: int) -> bool:
         return MobilityHelper.transaction_ablility[self.current_phase][self.mobility_list[sender_id].get_body_position()][time_slot]
 
+    def get_transaction_table(self, phase: MovementPhase, node_count: int, time_slots: int) -> np.ndarray:
+        """
+        can_transaction of every sender in every time slot of the phase
+        :return: bool array [time slot, sender id]
+        """
+        return np.array([
+            [MobilityHelper.transaction_ablility[phase][self.mobility_list[sender_id].get_body_position()][time_slot]
+             for sender_id in range(node_count)]
+            for time_slot in range(time_slots)
+        ], dtype=bool)
+
     def change_cycle(self, env):
         if self.current_phase == MovementPhase.PHASE_0:
             MobilityHelper.logger.log(
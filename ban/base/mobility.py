@@ -36,6 +36,8 @@ class BodyPosition(Enum):
 
 
 class MobilityModel:
+    __slots__ = ("body_position",)
+
     def __init__(self, body_position: BodyPosition):
         self.body_position: BodyPosition = body_position
 
@@ -1,20 +1,15 @@
 from ban.base.channel.base_channel import SpectrumSignalParameters
-from ban.config.JSONConfig import JSONConfig
+from ban.base.pool import ObjectPool
 from ban.device.mac_header import BanFrameSubType, BanMacHeader, Data, Beacon, IAck, BanFrameType
 
 class Packet:
-    def __init__(self, packet_size: int):
-
-        # read "packet_size" value from JSON config
-        packet_size_from_config: int | str = JSONConfig.get_config("packet_size")
+    __slots__ = ("size", "success", "__spectrum_tx_params", "mac_header", "__mac_frame_body")
 
-        if packet_size_from_config is not None:
-            packet_size_from_config = int(packet_size_from_config)
-            self.__size = packet_size_from_config
-        else:
-            self.__size = packet_size
+    def __init__(self, packet_size: int):
+        # bytes, the caller picks the size (see "packet_size", "ack_frame_size" and "beacon_frame_size" in config.json)
+        self.size = packet_size
 
-        self.__success = False
+        self.success = False
         self.__spectrum_tx_params = SpectrumSignalParameters()
         self.mac_header = BanMacHeader()
 
@@ -82,19 +77,28 @@ class Packet:
         return self.__spectrum_tx_params
 
     def get_size(self):
-        return self.__size
+        return self.size
 
     def set_success(self, status: bool):
-        self.__success = status
+        self.success = status
         return
 
     def get_success(self):
-        return self.__success
+        return self.success
 
     def copy(self):
-        new_packet = Packet(self.__size)
-        new_packet.set_spectrum_tx_params(self.get_spectrum_tx_params())
-        new_packet.set_mac_header_(self.get_mac_header())
+        # the copy owns its header and spectrum parameters, so either packet can be released on its own
+        # every field is overwritten below, so the pooled packet is not reset first
+        new_packet: Packet = packet_pool.acquire()
+        new_packet.size = self.size
+
+        spec_params = new_packet.get_spectrum_tx_params()
+        spec_params.duration = self.__spectrum_tx_params.duration
+        spec_params.tx_phy = self.__spectrum_tx_params.tx_phy
+        spec_params.tx_power = self.__spectrum_tx_params.tx_power
+        spec_params.tx_antenna = self.__spectrum_tx_params.tx_antenna
+
+        new_packet.get_mac_header().copy_from(self.get_mac_header())
         new_packet.set_frame_body(self.get_frame_body())
         new_packet.set_success(self.get_success())
 
@@ -102,3 +106,29 @@ class Packet:
 
     def set_data(self):
         return
+
+    def reset(self, packet_size: int):
+        self.size = packet_size
+        self.success = False
+        self.__spectrum_tx_params.reset()
+        self.mac_header.reset()
+        self.__mac_frame_body = None
+
+    @staticmethod
+    def acquire(packet_size: int) -> "Packet":
+        """
+        get a packet from the pool, the mac header, frame control and spectrum parameters come with it
+        :param packet_size: bytes
+        :return: Packet
+        """
+        packet: Packet = packet_pool.acquire()
+        packet.reset(packet_size)
+
+        return packet
+
+    def release(self):
+        # the caller must not touch this packet after release
+        packet_pool.release(self)
+
+
+packet_pool: ObjectPool[Packet] = ObjectPool("Packet", factory=lambda: Packet(0))
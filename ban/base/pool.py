@@ -0,0 +1,116 @@
+from dataclasses import fields
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class UseAfterReleaseError(Exception):
+    pass
+
+
+class ObjectPool(Generic[T]):
+    """
+    Free-list of reusable objects.
+
+    acquire() pops a released object (or creates one with the factory) and resets it, release() pushes it back.
+    The owner releases an object at a well-defined point (after ACK, after a drop, after the receive path), so the
+    pool never has to guess whether an object is still referenced.
+
+    In debug mode a released object is switched to a poisoned subclass until it is acquired again, and any attribute
+    access on it raises UseAfterReleaseError. A second release of the same object is also reported.
+    """
+    debug: bool = False
+    pools: dict[str, "ObjectPool"] = dict()
+    released_classes: dict[type, type] = dict()
+
+    def __init__(self, name: str, factory: Callable[[], T], reset: Callable[[T], None] | None = None,
+                 max_size: int = 4096):
+        self.name = name
+        self.factory = factory
+        self.reset = reset
+        self.max_size = max_size           # released objects beyond this are left to the GC
+        self.free_list: list[T] = list()
+
+        self.created_count = 0
+        self.reused_count = 0
+        self.released_count = 0
+
+        ObjectPool.pools[name] = self
+
+    @staticmethod
+    def set_debug(debug: bool):
+        ObjectPool.debug = debug
+
+    @staticmethod
+    def get_released_class(cls: type) -> type:
+        released_class = ObjectPool.released_classes.get(cls)
+
+        if released_class is None:
+            def fail(obj, name, *args):
+                raise UseAfterReleaseError(f"{cls.__name__} is used after release (attribute: {name})")
+
+            # an empty __slots__ keeps the layout of cls, so __class__ can be switched back and forth
+            released_class = type(f"Released{cls.__name__}", (cls,), {
+                "__slots__": (),
+                "__getattribute__": fail,
+                "__setattr__": fail,
+            })
+            ObjectPool.released_classes[cls] = released_class
+
+        return released_class
+
+    def acquire(self) -> T:
+        if self.free_list:
+            obj = self.free_list.pop()
+            self.reused_count += 1
+
+            if ObjectPool.debug:
+                object.__setattr__(obj, "__class__", type(obj).__base__)
+        else:
+            obj = self.factory()
+            self.created_count += 1
+
+        if self.reset is not None:
+            self.reset(obj)
+
+        return obj
+
+    def release(self, obj: T):
+        if ObjectPool.debug:
+            if type(obj) in ObjectPool.released_classes.values():
+                raise UseAfterReleaseError(f"{type(obj).__base__.__name__} is released twice")
+
+            object.__setattr__(obj, "__class__", ObjectPool.get_released_class(type(obj)))
+
+        self.released_count += 1
+
+        if len(self.free_list) < self.max_size:
+            self.free_list.append(obj)
+
+    def get_stats(self) -> dict:
+        return {
+            "created": self.created_count,
+            "reused": self.reused_count,
+            "released": self.released_count,
+            "free": len(self.free_list),
+        }
+
+    @staticmethod
+    def get_all_stats() -> dict[str, dict]:
+        return {name: pool.get_stats() for name, pool in ObjectPool.pools.items()}
+
+
+# dataclass type -> ((field name, default value), ...), fields() is too slow to call at every acquire
+dataclass_defaults: dict[type, tuple[tuple[str, object], ...]] = dict()
+
+
+def reset_dataclass(obj):
+    """reset every field of a dataclass instance to its default value"""
+    defaults = dataclass_defaults.get(type(obj))
+
+    if defaults is None:
+        defaults = tuple((field.name, field.default) for field in fields(obj))
+        dataclass_defaults[type(obj)] = defaults
+
+    for name, default in defaults:
+        setattr(obj, name, default)
@@ -1,7 +1,7 @@
 import enum
 import logging
 import random
-from collections import namedtuple, defaultdict
+from collections import namedtuple
 from typing import Dict
 
 import numpy as np
@@ -86,16 +86,19 @@ class QLearningTrainer:
         else:
             self.action_space: tuple[int, ...] = tuple(i for i in range(self.node_count))
 
-        self.q_table = defaultdict(lambda: np.zeros(len(self.action_space)))  # "할당하지 않음" 포함
+        # q_table[phase index, slot, action index], "할당하지 않음" 포함
+        self.phases: tuple[MovementPhase, ...] = tuple(self.mobility_helper.phase_info.phases)
+        self.phase_indices: dict[MovementPhase, int] = {phase: i for i, phase in enumerate(self.phases)}
+        self.q_table: np.ndarray = np.zeros((len(self.phases), self.time_slots, len(self.action_space)))
 
         '''initalize q_table(for first slot allocation)'''
-        for phase in self.mobility_helper.phase_info.phases:
-            for slot in range(time_slots):
-                self.q_table[State(phase, slot)] = np.zeros(len(self.action_space))
-                if self.use_unallocated:
-                    self.q_table[State(phase, slot)][slot + 1] = np.float32(0.00001)
-                else:
-                    self.q_table[State(phase, slot)][slot] = np.float32(0.00001)
+        offset = 1 if self.use_unallocated else 0
+        seeded_slots = np.arange(min(self.time_slots, len(self.action_space) - offset))
+        self.q_table[:, seeded_slots, seeded_slots + offset] = np.float32(0.00001)
+
+        # do not schedule nodes in slots where the mobility table blocks their transmission
+        self.mask_infeasible = bool(JSONConfig.get_config("q_learning_mask_infeasible"))
+        self.action_masks: dict[int, np.ndarray] = dict()   # phase index -> bool [slot, action index]
 
         self.off = False
         self.first = True
@@ -116,7 +119,7 @@ class QLearningTrainer:
 
         # exploit
         else:
-            action = self.action_space[np.argmax(self.q_table[current_state])]
+            action = self.action_space[np.argmax(self.q_table[self.phase_indices[current_state.phase], current_state.slot])]
 
         QLearningTrainer.logger.log(
             sim_time=self.sscs.env.now,
@@ -129,20 +132,20 @@ class QLearningTrainer:
         return action
 
 
-    def get_next_state(self, current_state: State, action: int) -> State:
+    def get_next_state(self, current_state: State, action: int) -> State | None:
         '''
         :param current_state: State, current state
         :param action: action(not used)
-        :return next_state: next state
+        :return next_state: next state, None after the last time slot
         '''
 
         if current_state.slot + 1 == self.time_slots:
-            return State(phase=current_state.phase, slot=-1)
+            return None
 
         return State(phase=current_state.phase, slot=current_state.slot + 1)
 
 
-    def update_q_table(self, current_state: State, action: int, reward: float, next_state: State):
+    def update_q_table(self, current_state: State, action: int, reward: float, next_state: State | None):
         if self.off:
             return
 
@@ -154,20 +157,70 @@ class QLearningTrainer:
 
         # 다음 행동 중 가장 가치가 큰 행동 선택
 
+        phase_index = self.phase_indices[current_state.phase]
+
         # 최종 행동(마지막 타임 슬롯)인 경우
-        if next_state.slot == -1:
+        if next_state is None:
             td_target = reward
         else:
-            best_next_action = np.argmax(self.q_table[next_state])
-            td_target = reward + self.discount_factor * self.q_table[next_state][best_next_action]
+            td_target = reward + self.discount_factor * self.q_table[phase_index, next_state.slot].max()
 
-        td_delta = td_target - self.q_table[current_state][action]
+        td_delta = td_target - self.q_table[phase_index, current_state.slot, action]
 
-        self.q_table[current_state][action] += self.learning_rate * td_delta
+        self.q_table[phase_index, current_state.slot, action] += self.learning_rate * td_delta
 
         return
 
 
+    def update_q_table_batch(self, phase_indices: np.ndarray, slots: np.ndarray, actions: np.ndarray,
+                             rewards: np.ndarray):
+        """
+        update_q_table for a run of transitions (phase index, slot, action) -> slot + 1 at once,
+        the caller guarantees that no transition reads or writes a Q-value written by an earlier transition of the run
+        (see split_independent_runs)
+        """
+        if self.off:
+            return
+
+        QLearningTrainer.logger.log(
+            sim_time=self.sscs.env.now,
+            msg=f"COORDINATOR: updating Q-table, states: {slots.tolist()}, "
+                f"actions: {actions.tolist()}, rewards: {rewards.tolist()}",
+            level=logging.INFO
+        )
+
+        # 최종 행동(마지막 타임 슬롯)인 경우 다음 상태의 가치는 0
+        terminal = slots + 1 == self.time_slots
+        next_values = self.q_table[phase_indices, np.where(terminal, slots, slots + 1)].max(axis=-1)
+        td_targets = np.where(terminal, rewards, rewards + self.discount_factor * next_values)
+
+        current_values = self.q_table[phase_indices, slots, actions]
+        self.q_table[phase_indices, slots, actions] = current_values + self.learning_rate * (td_targets - current_values)
+
+
+    def split_independent_runs(self, phase_indices: np.ndarray, slots: np.ndarray) -> list[range]:
+        """
+        split a sequence of transitions into runs that can be updated at once with the same result as one by one:
+        a run ends before a transition whose state, or next state, was already updated inside the run
+        """
+        runs: list[range] = []
+        start = 0
+        updated = set()
+
+        for i, (phase_index, slot) in enumerate(zip(phase_indices.tolist(), slots.tolist())):
+            if (phase_index, slot) in updated or (slot + 1 < self.time_slots and (phase_index, slot + 1) in updated):
+                runs.append(range(start, i))
+                start = i
+                updated.clear()
+
+            updated.add((phase_index, slot))
+
+        if start < len(slots):
+            runs.append(range(start, len(slots)))
+
+        return runs
+
+
     def calculate_reward(self, action: int) -> float:
         if self.off:
             return 0
@@ -188,6 +241,54 @@ class QLearningTrainer:
         return reward
 
 
+    def calculate_rewards(self, actions: np.ndarray) -> np.ndarray:
+        """calculate_reward for every action, the tracers are read once"""
+        if self.off:
+            return np.zeros(len(actions))
+
+        throughputs = np.array([self.get_throughput(node_id) for node_id in range(self.node_count)], dtype=float)
+        priorities = np.array([self.get_node_priority(node_id) for node_id in range(self.node_count)], dtype=float)
+
+        # -1 (unallocated) picks the last node here, it is overwritten below
+        throughput = throughputs[actions]
+        priority = priorities[actions]
+
+        # 전송 데이터가 0인 경우 음의 보상
+        rewards = np.where(throughput == 0, -1 * priority, 0.001 * throughput * priority)
+
+        # 할당되지 않은 슬롯 발견 시 약한 음의 보상
+        return np.where(actions == -1, -0.1, rewards)
+
+
+    def train_batch(self, time_slot_indices: list[int], allocated_node_ids: list[int],
+                    mobility_phases: list[MovementPhase]):
+        """
+        train with every slot of a finished beacon, same result as calling train for each slot in order
+        :param time_slot_indices: slot index of each allocation
+        :param allocated_node_ids: node's id that allocated at that time slot (the action)
+        :param mobility_phases: movement phase of each allocation
+        """
+        if self.off or not time_slot_indices:
+            return
+
+        QLearningTrainer.logger.log(
+            sim_time=self.sscs.env.now,
+            msg=f"training, time slots: {time_slot_indices}, allocated: {allocated_node_ids}",
+            level=logging.INFO
+        )
+
+        actions = np.asarray(allocated_node_ids, dtype=int)
+        slots = np.asarray(time_slot_indices, dtype=int)
+        phase_indices = np.array([self.phase_indices[phase] for phase in mobility_phases], dtype=int)
+        rewards = self.calculate_rewards(actions)
+
+        for run in self.split_independent_runs(phase_indices, slots):
+            self.update_q_table_batch(
+                phase_indices[run.start:run.stop], slots[run.start:run.stop], actions[run.start:run.stop],
+                rewards[run.start:run.stop]
+            )
+
+
     def train(self, time_slot_index: int, allocated_node_id: int, mobility_phase: MovementPhase):
         if self.off:
             return
@@ -214,16 +315,31 @@ class QLearningTrainer:
             # return random.sample([i for i in range(self.node_count)], self.time_slots)
             return [i for i in range(self.node_count)] + [-1 for _ in range(self.time_slots - self.node_count)]
 
-        unallocated = -1
-        time_slots = [unallocated for _ in range(self.time_slots)]
+        phase_index = self.phase_indices[phase]
+        q_values = self.q_table[phase_index]     # [slot, action index]
+
+        # random action and greedy action of every slot, the random one is kept where we explore
+        if self.mask_infeasible:
+            action_mask = self.get_action_mask(phase_index)
+            random_actions = np.argmax(np.where(action_mask, np.random.rand(*q_values.shape), -1.0), axis=-1)
+            greedy_actions = np.argmax(np.where(action_mask, q_values, -np.inf), axis=-1)
+        else:
+            random_actions = np.random.randint(len(self.action_space), size=self.time_slots)
+            greedy_actions = np.argmax(q_values, axis=-1)
 
-        state: State = State(phase=phase, slot=0)
+        if self.first:
+            action_indices = greedy_actions
+        else:
+            explore = np.random.rand(self.time_slots) < self.exploration_rate
+            action_indices = np.where(explore, random_actions, greedy_actions)
 
-        for i in range(self.time_slots):
-            node: int = self.choose_action(current_state=state)
+        time_slots = [self.action_space[i] for i in action_indices.tolist()]
 
-            time_slots[i] = node
-            state = State(phase=state.phase, slot=state.slot + 1)
+        QLearningTrainer.logger.log(
+            sim_time=self.sscs.env.now,
+            msg=f"actions are: {time_slots}",
+            level=logging.DEBUG
+        )
 
         # TODO: 스루풋 초기화 시점
         self.reset_throughput()
@@ -233,6 +349,85 @@ class QLearningTrainer:
         return time_slots
 
 
+    def save_q_table(self, file_path: str):
+        """
+        save the Q-table with the metadata needed to check it on load, to a compressed .npz file
+        :param file_path: destination, numpy appends .npz if it is missing
+        """
+        np.savez_compressed(
+            file_path,
+            q_table=self.q_table,
+            phases=np.array([phase.name for phase in self.phases]),
+            time_slots=np.array(self.time_slots),
+            action_space=np.array(self.action_space),
+            learning_rate=np.array(self.learning_rate),
+            discount_factor=np.array(self.discount_factor),
+            exploration_rate=np.array(self.exploration_rate),
+        )
+
+        QLearningTrainer.logger.log(
+            sim_time=self.sscs.env.now if self.sscs.env is not None else 0,
+            msg=f"Q-table saved to {file_path}",
+            level=logging.INFO
+        )
+
+
+    def load_q_table(self, file_path: str, restore_hyperparameters: bool = False):
+        """
+        warm-start from a Q-table saved by save_q_table
+        :param file_path: .npz file
+        :param restore_hyperparameters: also take learning rate, discount factor and exploration rate from the file
+        """
+        with np.load(file_path) as data:
+            phases = tuple(data["phases"].tolist())
+            action_space = tuple(data["action_space"].tolist())
+            q_table = data["q_table"]
+
+            if phases != tuple(phase.name for phase in self.phases):
+                raise ValueError(f"{file_path}: movement phases {phases} do not match {[p.name for p in self.phases]}")
+            if int(data["time_slots"]) != self.time_slots:
+                raise ValueError(f"{file_path}: {int(data['time_slots'])} time slots, expected {self.time_slots}")
+            if action_space != self.action_space:
+                raise ValueError(f"{file_path}: action space {action_space} does not match {self.action_space}")
+            if q_table.shape != self.q_table.shape:
+                raise ValueError(f"{file_path}: Q-table shape {q_table.shape}, expected {self.q_table.shape}")
+
+            self.q_table = q_table.astype(float)
+
+            if restore_hyperparameters:
+                self.learning_rate = float(data["learning_rate"])
+                self.discount_factor = float(data["discount_factor"])
+                self.exploration_rate = float(data["exploration_rate"])
+
+        QLearningTrainer.logger.log(
+            sim_time=self.sscs.env.now if self.sscs.env is not None else 0,
+            msg=f"Q-table loaded from {file_path}",
+            level=logging.INFO
+        )
+
+
+    def get_action_mask(self, phase_index: int) -> np.ndarray:
+        """
+        :return: bool [slot, action index], False where the mobility table blocks the node of the action in the slot
+        """
+        action_mask = self.action_masks.get(phase_index)
+
+        if action_mask is None:
+            feasible = self.mobility_helper.get_transaction_table(self.phases[phase_index], self.node_count, self.time_slots)
+            actions = np.array(self.action_space)
+            node_actions = actions >= 0
+
+            # "할당하지 않음"(-1)은 항상 가능
+            action_mask = np.ones((self.time_slots, len(actions)), dtype=bool)
+            action_mask[:, node_actions] = feasible[:, actions[node_actions]]
+
+            # a slot nobody can use falls back to every action
+            action_mask[~action_mask.any(axis=-1)] = True
+            self.action_masks[phase_index] = action_mask
+
+        return action_mask
+
+
     def detect_movement_phase(self) -> MovementPhase:
         return self.mobility_helper.current_phase
 
@@ -257,7 +452,7 @@ class QLearningTrainer:
         return
 
     def print_throughput(self):
-        throughputs = tuple(f"{len(self.tracers[i].success_tx_packet)}/{len(self.tracers[i].tx_packet)} " for i in range(len(self.tracers)))
+        throughputs = tuple(f"{self.tracers[i].success_tx_packet_count}/{self.tracers[i].tx_packet_count} " for i in range(len(self.tracers)))
 
         QLearningTrainer.logger.log(
             sim_time=self.sscs.env.now,
@@ -0,0 +1,134 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, TextIO
+
+from ban.base.packet import Packet
+from ban.config.JSONConfig import JSONConfig
+from ban.device.mac_header import FRAME_SUBTYPE_DATA_UP0
+
+
+@dataclass(slots=True, frozen=True)
+class RxRecord:
+    time: float             # seconds
+    sender_id: int
+    sequence_number: int | None
+    priority: int           # user priority, 0 (UP0) ~ 7 (UP7)
+    size: int               # bytes
+
+    @staticmethod
+    def from_packet(time: float, packet: Packet) -> "RxRecord":
+        mac_header = packet.get_mac_header()
+        frame_control = mac_header.get_frame_control()
+
+        return RxRecord(
+            time=time,
+            sender_id=mac_header.sender_id,
+            sequence_number=frame_control.sequence_number,
+            priority=frame_control.frame_subtype_code - FRAME_SUBTYPE_DATA_UP0,
+            size=packet.get_size(),
+        )
+
+
+class RxSink(ABC):
+    """
+    Receiver of the data frames delivered to the coordinator SSCS.
+
+    A sink never keeps the packet, the MAC releases it to the pool after the ACK,
+    so memory of a long run depends only on the sink (constant for all sinks below).
+    """
+    @abstractmethod
+    def receive(self, time: float, packet: Packet):
+        pass
+
+    def get_data(self) -> list[RxRecord]:
+        return list()
+
+    def close(self):
+        pass
+
+
+class CountingSink(RxSink):
+    """counts received frames and bytes per sender, the default sink"""
+    def __init__(self):
+        self.packet_count = 0
+        self.byte_count = 0
+        self.packet_count_by_sender: dict[int, int] = dict()
+        self.byte_count_by_sender: dict[int, int] = dict()
+
+    def receive(self, time: float, packet: Packet):
+        sender_id = packet.get_mac_header().sender_id
+        size = packet.get_size()
+
+        self.packet_count += 1
+        self.byte_count += size
+        self.packet_count_by_sender[sender_id] = self.packet_count_by_sender.get(sender_id, 0) + 1
+        self.byte_count_by_sender[sender_id] = self.byte_count_by_sender.get(sender_id, 0) + size
+
+
+class RingBufferSink(CountingSink):
+    """counts like CountingSink and keeps the records of the last capacity frames, for debugging"""
+    def __init__(self, capacity: int = 1024):
+        super().__init__()
+        self.records: deque[RxRecord] = deque(maxlen=capacity)
+
+    def receive(self, time: float, packet: Packet):
+        super().receive(time, packet)
+        self.records.append(RxRecord.from_packet(time, packet))
+
+    def get_data(self) -> list[RxRecord]:
+        return list(self.records)
+
+
+class StreamingSink(CountingSink):
+    """
+    counts like CountingSink and hands every record to a callback,
+    or writes it as a CSV line (time,sender_id,sequence_number,priority,size) to a file
+    """
+    def __init__(self, callback: Callable[[RxRecord], None] | None = None, file_path: str | None = None):
+        super().__init__()
+        if (callback is None) == (file_path is None):
+            raise ValueError("StreamingSink needs either a callback or a file path")
+
+        self.callback = callback
+        self.file: TextIO | None = None
+
+        if file_path is not None:
+            self.file = open(file_path, 'w', encoding="UTF8")
+            self.file.write("time,sender_id,sequence_number,priority,size\n")
+
+    def receive(self, time: float, packet: Packet):
+        super().receive(time, packet)
+        record = RxRecord.from_packet(time, packet)
+
+        if self.callback is not None:
+            self.callback(record)
+        else:
+            self.file.write(
+                f"{record.time:.9f},{record.sender_id},{record.sequence_number},{record.priority},{record.size}\n"
+            )
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def create_rx_sink() -> RxSink:
+    """build the sink named by "rx_sink" ("counting", "ring_buffer", "stream") in the configuration"""
+    sink_type = JSONConfig.get_config("rx_sink") or "counting"
+
+    if sink_type == "counting":
+        return CountingSink()
+
+    if sink_type == "ring_buffer":
+        capacity = JSONConfig.get_config("rx_sink_capacity")
+        return RingBufferSink(1024 if capacity is None else int(capacity))
+
+    if sink_type == "stream":
+        file_path = JSONConfig.get_config("rx_sink_file")
+        if file_path is None:
+            raise ValueError("rx_sink \"stream\" needs rx_sink_file")
+        return StreamingSink(file_path=file_path)
+
+    raise ValueError(f"unknown rx_sink: {sink_type}")
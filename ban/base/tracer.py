@@ -1,31 +1,58 @@
 import logging
-import math
+from collections import defaultdict
 
 from ban.base.logging.log import SeoungSimLogger
 from ban.base.packet import Packet
+from ban.device.mac_header import AggregateData
 
 
 class Tracer:
     logger = SeoungSimLogger(logger_name="TRACER", level=logging.DEBUG)
 
+    __slots__ = (
+        "env", "tx_packet_count", "total_tx_packet", "success_tx_packet_count", "total_success_tx_packet",
+        "success_tx_bit", "total_success_tx_bit", "consume_energy", "initial_energy", "trx_state", "trx_power",
+        "trx_state_time", "trx_state_duration", "reset_time", "transaction_count", "enqueued_packet_count",
+        "requested_packet_count", "queue_length", "max_queue_length", "queue_length_time", "queue_length_area",
+        "queue_drop_count", "queue_expired_count", "queue_latency_sum", "queue_latency_count", "retry_count",
+    )
+
     def __init__(self):
         self.env = None
-        self.tx_packet = list()
+        self.tx_packet_count = 0             # since the last reset
         self.total_tx_packet = 0
-        self.success_tx_packet = list()
+        self.success_tx_packet_count = 0     # since the last reset
         self.total_success_tx_packet = 0
         self.success_tx_bit = 0
         self.total_success_tx_bit = 0
-        self.consume_energy = 0  # watt
+        self.consume_energy = 0.0  # joule
         self.initial_energy = None
+        self.trx_state = None
+        self.trx_power = 0.0  # watt, power draw of the current transceiver state
+        self.trx_state_time = 0.0  # time when the current transceiver state was entered
+        self.trx_state_duration = defaultdict(float)  # transceiver state -> seconds spent in that state
         self.reset_time = None
         self.transaction_count = 0
         self.enqueued_packet_count: int = 0
         self.requested_packet_count: int = 0
 
+        # MAC TX queue statistics
+        self.queue_length: int = 0
+        self.max_queue_length: int = 0
+        self.queue_length_time: float = 0.0  # time of the last queue length change
+        self.queue_length_area: float = 0.0  # integral of the queue length over time
+        self.queue_drop_count: int = 0       # packets dropped because the queue was full
+        self.queue_expired_count: int = 0    # packets dropped because they waited too long
+        self.queue_latency_sum: list[float] = [0.0] * 8  # per user priority (UP0-UP7)
+        self.queue_latency_count: list[int] = [0] * 8
+
+        self.retry_count: int = 0            # retransmissions after an ACK timeout
+
     def set_env(self, env):
         self.env = env
         self.reset_time = self.env.now
+        self.trx_state_time = self.env.now
+        self.queue_length_time = self.env.now
 
     def set_initial_energy(self, energy):
         self.initial_energy = energy
@@ -36,23 +63,30 @@ class Tracer:
             msg="reset tracer.",
             level=logging.DEBUG
         )
-        self.tx_packet.clear()
-        self.success_tx_packet.clear()
+        self.tx_packet_count = 0
+        self.success_tx_packet_count = 0
         self.success_tx_bit = 0
         # self.consume_energy: float = 0.0
         self.reset_time = self.env.now
 
-    def add_tx_packet(self, packet: Packet):
+    def add_tx_packet(self, packet: Packet, retransmission: bool = False):
         Tracer.logger.log(
             sim_time=self.env.now,
             msg=f"added TX packet.",
             level=logging.DEBUG
         )
+        # a retransmission is another transaction of packets that were already counted
+        if retransmission is True:
+            self.transaction_count += 1
+            return
+
+        # an aggregate frame is one transaction that carries several packets
+        frame_body = packet.get_frame_body()
+        packet_count = len(frame_body.packets) if isinstance(frame_body, AggregateData) else 1
+
         self.transaction_count += 1
-        self.total_tx_packet += 1
-        self.tx_packet.append(packet)
-        tx_power = packet.get_spectrum_tx_params().tx_power
-        self.add_consumed_energy(tx_power)
+        self.tx_packet_count += packet_count
+        self.total_tx_packet += packet_count
 
     def add_success_tx_packet(self, packet: Packet):
         Tracer.logger.log(
@@ -61,7 +95,8 @@ class Tracer:
             level=logging.DEBUG
         )
 
-        self.success_tx_packet.append(packet)
+        # packets are only counted, they go back to the packet pool after ACK
+        self.success_tx_packet_count += 1
         self.total_success_tx_packet += 1
         self.total_success_tx_bit += packet.get_size() * 8
         self.success_tx_bit += packet.get_size() * 8
@@ -80,33 +115,102 @@ class Tracer:
         return self.success_tx_bit / (self.env.now - self.reset_time)
 
 
-    def add_consumed_energy(self, dbm: float):
-        # convert dBm to watt
-        if dbm == 0:
-            w = 0.001
-        else:
-            mw = math.pow(10.0, dbm / 10.0)
-            w = mw / 1000.0
+    def change_trx_state(self, trx_state, power: float):
+        """
+        charge the energy spent in the previous transceiver state and enter the new one
+        :param trx_state: new transceiver state
+        :param power: power draw of the new state (watt)
+        :return:
+        """
+        now = self.env.now
+        duration = now - self.trx_state_time
+
+        self.consume_energy += duration * self.trx_power
+        self.trx_state_duration[self.trx_state] += duration
+
+        self.trx_state = trx_state
+        self.trx_power = power
+        self.trx_state_time = now
+
 
-        self.consume_energy += w
+    def get_consumed_energy(self) -> float:
+        # energy charged so far plus the time spent in the current state
+        return self.consume_energy + (self.env.now - self.trx_state_time) * self.trx_power
 
 
     def get_energy_consumption_ratio(self):
         if self.initial_energy is None:
             print('Initial energy was not initialized')
         else:
-            return self.consume_energy / self.initial_energy
+            return self.get_consumed_energy() / self.initial_energy
+
+
+    def get_energy_per_bit(self) -> float:
+        # joule per successfully delivered bit
+        if self.total_success_tx_bit == 0:
+            return 0
+
+        return self.get_consumed_energy() / self.total_success_tx_bit
 
 
     def get_pkt_delivery_ratio(self, total=False):
         if total:
             return self.total_success_tx_packet / self.total_tx_packet if self.total_tx_packet != 0 else 0
 
-        if len(self.success_tx_packet) == 0 or len(self.tx_packet) == 0:
+        if self.success_tx_packet_count == 0 or self.tx_packet_count == 0:
             return 0
 
 
-        return len(self.success_tx_packet) / len(self.tx_packet)
+        return self.success_tx_packet_count / self.tx_packet_count
+
+
+    def update_queue_length(self, length: int):
+        now = self.env.now
+        self.queue_length_area += self.queue_length * (now - self.queue_length_time)
+        self.queue_length = length
+        self.queue_length_time = now
+
+        if length > self.max_queue_length:
+            self.max_queue_length = length
+
+
+    def add_queue_drop(self, expired: bool = False):
+        if expired:
+            self.queue_expired_count += 1
+        else:
+            self.queue_drop_count += 1
+
+
+    def get_average_queue_length(self) -> float:
+        # time-weighted average since the start of the simulation
+        if self.env.now == 0:
+            return 0
+
+        return (self.queue_length_area + self.queue_length * (self.env.now - self.queue_length_time)) / self.env.now
+
+
+    def add_queue_latency(self, priority: int, latency: float):
+        self.queue_latency_sum[priority] += latency
+        self.queue_latency_count[priority] += 1
+
+
+    def get_average_queue_latency(self, priority: int) -> float:
+        if self.queue_latency_count[priority] == 0:
+            return 0
+
+        return self.queue_latency_sum[priority] / self.queue_latency_count[priority]
+
+
+    def add_retry(self):
+        self.retry_count += 1
+
+
+    def get_retry_count(self) -> int:
+        return self.retry_count
+
+
+    def get_queue_drop_count(self) -> int:
+        return self.queue_drop_count + self.queue_expired_count
 
 
     def get_transaction_count(self):
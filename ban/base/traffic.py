@@ -0,0 +1,275 @@
+import heapq
+from abc import ABC, abstractmethod
+from typing import Callable
+
+import numpy as np
+import simpy
+from simpy.events import NORMAL
+
+from ban.config.JSONConfig import JSONConfig
+
+
+class TrafficGenerator(ABC):
+    """
+    Arrival process of one node.
+
+    Arrival times are drawn in blocks of BLOCK_SIZE with NumPy and handed out one at a time by next_arrival(),
+    so the per-packet cost is an array index instead of a random draw and a new closure.
+    The first arrival is at start + initial offset, every later arrival is the previous one + an inter-arrival time.
+    """
+    BLOCK_SIZE = 256
+
+    def __init__(self, rng: np.random.Generator, start: float = 0.0, priority: int = 0):
+        self.rng = rng
+        self.start = start
+        self.priority = priority
+
+        self.__block: np.ndarray = np.empty(0)
+        self.__index = 0
+        self.__last: float | None = None
+
+    @abstractmethod
+    def draw_intervals(self, size: int) -> np.ndarray:
+        """inter-arrival times of the next (at most) size packets (seconds), an empty array ends the stream"""
+        pass
+
+    def draw_initial_offset(self) -> float:
+        """delay of the first arrival from start"""
+        return float(self.draw_intervals(1)[0])
+
+    def next_block(self) -> np.ndarray:
+        intervals = np.asarray(self.draw_intervals(self.BLOCK_SIZE), dtype=float)
+        if intervals.size == 0:
+            return intervals
+
+        if self.__last is None:
+            origin = self.start
+            intervals[0] = self.draw_initial_offset()
+        else:
+            origin = self.__last
+
+        # cumulative sum from the previous arrival, same values as adding the intervals one by one
+        return np.cumsum(np.concatenate(((origin,), intervals)))[1:]
+
+    def next_arrival(self) -> float | None:
+        if self.__index == len(self.__block):
+            self.__block = self.next_block()
+            self.__index = 0
+
+            if len(self.__block) == 0:
+                return None
+
+            self.__last = float(self.__block[-1])
+
+        arrival = float(self.__block[self.__index])
+        self.__index += 1
+
+        return arrival
+
+
+class PeriodicTraffic(TrafficGenerator):
+    """one packet every period, each interval shifted by uniform(-jitter, +jitter)"""
+    def __init__(self, rng: np.random.Generator, period: float, jitter: float = 0.0, start: float = 0.0,
+                 priority: int = 0):
+        super().__init__(rng, start, priority)
+        self.period = period
+        self.jitter = min(jitter, period)
+
+    def draw_intervals(self, size: int) -> np.ndarray:
+        intervals = np.full(size, self.period)
+        if self.jitter > 0:
+            intervals += self.rng.uniform(-self.jitter, self.jitter, size)
+
+        return intervals
+
+    def draw_initial_offset(self) -> float:
+        # 첫 패킷은 start 시점에 발생 (jitter 만큼만 지연)
+        if self.jitter > 0:
+            return float(self.rng.uniform(0.0, self.jitter))
+
+        return 0.0
+
+
+class PoissonTraffic(TrafficGenerator):
+    """Poisson arrivals with rate packets per second"""
+    def __init__(self, rng: np.random.Generator, rate: float, start: float = 0.0, priority: int = 0):
+        super().__init__(rng, start, priority)
+        self.rate = rate
+
+    def draw_intervals(self, size: int) -> np.ndarray:
+        return self.rng.exponential(1.0 / self.rate, size)
+
+
+class OnOffTraffic(TrafficGenerator):
+    """
+    bursty traffic: periodic packets during exponentially distributed on periods (mean on_time),
+    silent for exponentially distributed off periods (mean off_time) between the bursts
+    """
+    def __init__(self, rng: np.random.Generator, period: float, on_time: float, off_time: float,
+                 start: float = 0.0, priority: int = 0):
+        super().__init__(rng, start, priority)
+        self.period = period
+        self.on_time = on_time
+        self.off_time = off_time
+
+        # packets left in the burst that was still open at the end of the previous block
+        self.__burst_left = 0
+
+    def draw_intervals(self, size: int) -> np.ndarray:
+        intervals = np.full(size, self.period)
+
+        # packets per burst, geometric with mean on_time / period
+        burst_lengths = self.rng.geometric(min(1.0, self.period / self.on_time), size)
+
+        # index of the first packet of every burst, the open burst of the previous block goes on until the first one
+        burst_starts = self.__burst_left + np.concatenate(((0,), np.cumsum(burst_lengths)))
+        in_block = burst_starts[burst_starts < size]
+
+        # the interval before the first packet of a burst also covers the off period
+        intervals[in_block] += self.rng.exponential(self.off_time, in_block.size)
+
+        # size bursts of at least one packet always reach past the block
+        self.__burst_left = int(burst_starts[in_block.size]) - size
+
+        return intervals
+
+    def draw_initial_offset(self) -> float:
+        return 0.0
+
+
+class TraceTraffic(TrafficGenerator):
+    """replays recorded arrival times (seconds, relative to start), one per line of a text file"""
+    def __init__(self, rng: np.random.Generator, times: np.ndarray, start: float = 0.0, priority: int = 0):
+        super().__init__(rng, start, priority)
+        self.times = np.sort(np.asarray(times, dtype=float))
+
+        # the first interval is the offset of the first arrival from start
+        self.__intervals = np.diff(self.times, prepend=0.0)
+        self.__index = 0
+
+    @staticmethod
+    def from_file(rng: np.random.Generator, file_path: str, start: float = 0.0, priority: int = 0):
+        return TraceTraffic(rng, np.loadtxt(file_path, dtype=float, ndmin=1), start, priority)
+
+    def draw_intervals(self, size: int) -> np.ndarray:
+        intervals = self.__intervals[self.__index:self.__index + size]
+        self.__index += intervals.size
+
+        return intervals.copy()
+
+    def draw_initial_offset(self) -> float:
+        return float(self.__intervals[0])
+
+
+class TrafficScheduler:
+    """
+    Single arrival heap for all nodes.
+
+    The heap holds the next arrival of every source as (time, source index), and only one SimPy event is pending
+    at a time, for the earliest arrival. When it fires, every due arrival is popped (ties in source order),
+    delivered, and replaced by the next arrival of the same source.
+    """
+    def __init__(self, env: simpy.Environment):
+        self.env = env
+        self.__heap: list[tuple[float, int]] = list()
+        self.__sources: list[tuple[TrafficGenerator, Callable[[int], None]]] = list()
+        self.__event = None
+
+    def add_source(self, generator: TrafficGenerator, deliver: Callable[[int], None]):
+        """
+        :param generator: arrival process of the source
+        :param deliver: called with the priority of the generator at every arrival
+        """
+        self.__sources.append((generator, deliver))
+
+        arrival = generator.next_arrival()
+        if arrival is not None:
+            heapq.heappush(self.__heap, (arrival, len(self.__sources) - 1))
+
+    def get_source_count(self) -> int:
+        return len(self.__sources)
+
+    def start(self):
+        self.schedule_next()
+
+    def schedule_next(self):
+        if not self.__heap:
+            self.__event = None
+            return
+
+        event = self.env.event()
+        event._ok = True
+        event.callbacks.append(self.on_arrival)
+        self.env.schedule(event, priority=NORMAL, delay=max(0.0, self.__heap[0][0] - self.env.now))
+        self.__event = event
+
+    def on_arrival(self, event):
+        if event is not self.__event:
+            return
+
+        now = self.env.now
+        heap = self.__heap
+
+        while heap and heap[0][0] <= now:
+            _, index = heapq.heappop(heap)
+            generator, deliver = self.__sources[index]
+
+            deliver(generator.priority)
+
+            arrival = generator.next_arrival()
+            if arrival is not None:
+                heapq.heappush(heap, (arrival, index))
+
+        self.schedule_next()
+
+
+def create_traffic_generator(node_id: int, start: float = 0.0) -> TrafficGenerator:
+    """
+    build the traffic model of a node from the configuration
+
+    "traffic_models" is an optional list with one dict per node, its keys override the flat "traffic_*" defaults:
+    model ("periodic", "poisson", "on_off", "trace"), period, jitter, rate, on_time, off_time, trace_file, priority.
+    """
+    params = {
+        "model": JSONConfig.get_config("traffic_model"),
+        "period": JSONConfig.get_config("traffic_period"),
+        "jitter": JSONConfig.get_config("traffic_jitter"),
+        "rate": JSONConfig.get_config("traffic_rate"),
+        "on_time": JSONConfig.get_config("traffic_on_time"),
+        "off_time": JSONConfig.get_config("traffic_off_time"),
+        "trace_file": JSONConfig.get_config("traffic_trace_file"),
+        "priority": JSONConfig.get_config("traffic_priority"),
+    }
+
+    per_node = JSONConfig.get_config("traffic_models")
+    if per_node is not None and node_id < len(per_node) and per_node[node_id] is not None:
+        params.update(per_node[node_id])
+
+    seed = JSONConfig.get_config("traffic_seed")
+    rng = np.random.default_rng((7 if seed is None else int(seed)) + node_id)
+
+    model = params["model"] or "periodic"
+    period = 0.2 if params["period"] is None else float(params["period"])
+    priority = 0 if params["priority"] is None else int(params["priority"])
+    if not 0 <= priority <= 7:
+        raise ValueError(f"node {node_id}: traffic priority {priority} is not a user priority (0 ~ 7)")
+
+    if model == "periodic":
+        jitter = 0.0 if params["jitter"] is None else float(params["jitter"])
+        return PeriodicTraffic(rng, period, jitter, start, priority)
+
+    if model == "poisson":
+        rate = 1.0 / period if params["rate"] is None else float(params["rate"])
+        return PoissonTraffic(rng, rate, start, priority)
+
+    if model == "on_off":
+        on_time = 1.0 if params["on_time"] is None else float(params["on_time"])
+        off_time = 1.0 if params["off_time"] is None else float(params["off_time"])
+        return OnOffTraffic(rng, period, on_time, off_time, start, priority)
+
+    if model == "trace":
+        if params["trace_file"] is None:
+            raise ValueError(f"node {node_id}: trace traffic model needs a trace_file")
+        return TraceTraffic.from_file(rng, params["trace_file"], start, priority)
+
+    raise ValueError(f"node {node_id}: unknown traffic model {model}")
@@ -1,7 +1,8 @@
 import logging
 import math
-from queue import Queue
+from dataclasses import dataclass
 from enum import Enum
+from typing import Callable
 
 import simpy
 import tqdm
@@ -12,22 +13,33 @@ from ban.base.logging.log import SeoungSimLogger
 from ban.base.packet import Packet
 from ban.base.tracer import Tracer
 from ban.base.utils import microseconds
-from ban.base.channel.csma_ca import CsmaCa
+from ban.base.channel.csma_ca import CsmaCa, BanSuperframe
 from ban.config.JSONConfig import JSONConfig
-from ban.device.mac_header import BanFrameType, BanFrameSubType, BanMacHeader, Beacon, IAck, Data, AssignedLinkElement
-from ban.device.phy import BanPhyPibAttributes, BanPhy, BanPibAttributeIdentifier, BanPhyTRxState
-from ban.device.sscs import BanTxParams, BanSSCS, BanTxOption, BanDataConfirmStatus
+from ban.device.mac_header import BanFrameType, BanFrameSubType, BanMacHeader, Beacon, IAck, Data, AssignedLinkElement, \
+    BanMacState, AggregateData, BlockAck, IACK_BODY, DATA_BODIES, FRAME_TYPE_MANAGEMENT, FRAME_TYPE_CONTROL, \
+    FRAME_TYPE_DATA, FRAME_SUBTYPE_BEACON, FRAME_SUBTYPE_IACK, FRAME_SUBTYPE_BACK, FRAME_SUBTYPE_DATA_UP0
+from ban.device.phy import BanPhyPibAttributes, BanPhy, BanPibAttributeIdentifier, BanPhyTRxState, pib_attributes_pool
+from ban.device.sscs import BanTxParams, BanSSCS, BanTxOption, BanDataConfirmStatus, tx_params_pool
 from ban.device.mac_header import BanRecipientType
+from ban.device.mac_queue import BanTxQueue, BanQueueDropPolicy
 
 
-class BanMacState(Enum):
-    MAC_IDLE = 0
-    MAC_CSMA = 1
-    MAC_SENDING = 2
-    MAC_ACK_PENDING = 3
-    CHANNEL_ACCESS_FAILURE = 4
-    CHANNEL_IDLE = 5
-    SET_PHY_TX_ON = 6
+@dataclass(slots=True)
+class SlotPlan:
+    """
+    allocation interval of a node compiled once from the received beacon, every field is an absolute time (s)
+    """
+    start: float = 0.0            # the node starts sending
+    end: float = 0.0              # end of the allocation
+    tx_deadline: float = 0.0      # no frame starts later, less than the minimum slot would be left
+    ack_deadline: float = 0.0     # a data frame has to end before this, the guard time and its ACK follow
+
+    def latest_tx_start(self, tx_time: float) -> float:
+        # latest start of a frame that takes tx_time to send
+        return min(self.tx_deadline, self.ack_deadline - tx_time)
+
+    def fits(self, start_time: float, tx_time: float) -> bool:
+        return start_time < self.latest_tx_start(tx_time)
 
 
 class BanMac:
@@ -40,33 +52,64 @@ class BanMac:
     mClockResolution = 4                # us
     # A slot length can be calculated as pAllocationSlotMin + (L) * pAllocationSlotResolution = 1000 us (1 ms)
     mAllocationSlotLength = 1           # ms
+    # A sleeping node turns its receiver on this long before the next beacon is expected
+    mBeaconWakeUpGuard = 1000           # us
+    # derived durations (s) used by the per-beacon slot plan
+    mMinSlotDuration = microseconds(pAllocationSlotMin + mAllocationSlotLength * pAllocationSlotResolution)
+    mGuardTime = microseconds(pSIFS + pExtraIFS + mClockResolution)
 
     logger = SeoungSimLogger(logger_name="BAN-MAC", level=logging.DEBUG)
 
+    # frame body factory per frame subtype code: stateless bodies are shared, only a beacon is allocated per frame
+    frame_body_factories: dict[int, Callable[[], Beacon | IAck | Data]] = {
+        FRAME_SUBTYPE_BEACON: Beacon,
+        FRAME_SUBTYPE_IACK: lambda: IACK_BODY,
+        FRAME_SUBTYPE_BACK: BlockAck,
+        **{FRAME_SUBTYPE_DATA_UP0 + priority: (lambda body=body: body) for priority, body in enumerate(DATA_BODIES)},
+    }
+
     def __init__(self):
         self.env = None
         self.sscs = None
         self.phy = None
-        self.tx_queue = Queue()                    # packet queue
+        self.tx_queue = self.create_tx_queue()     # packet queue
         self.tx_packet: Packet | None = None       # a packet to be sent
         self.rx_packet: Packet | None = None       # a packet received now
         self.mac_state = BanMacState.MAC_IDLE
         self.mac_rx_on_when_idle = True
+        self.awaiting_beacon = True                # keep the receiver on until the next beacon is received
         self.mac_params = BanTxParams()
         self.tracer = Tracer()
         self.csma_ca = None
 
         self.ack_wait_time = None
         self.seq_num = 0
-        self.prev_tx_status = False
+        self.ack_timeout_event: simpy.Event | None = None    # pending ACK timer, cancelled when the ACK arrives
         self.alloc_start_time = 0
         self.alloc_end_time = 0
         self.beacon_rx_time = 0
+        self.slot_plan = SlotPlan()                # absolute times of the current allocation
         self.tx_power = 0
-        self.initial_energy = 1
+        self.initial_energy = 2430
 
         self.time_slot_index = None
         self.packet_sent = False
+        self.random_access = False                 # contend with slotted CSMA/CA in the beacon's RAP
+        self.frame_aggregation = False             # pack the queued frames that fit in the slot into one frame
+        self.ack_packet_size = 0                   # bytes
+        self.block_ack = False                     # send a burst of frames acknowledged by one B-ACK
+        self.burst_packets: list[Packet] = []      # frames of the current burst sent before self.tx_packet
+        self.burst_seq_num = 0
+        self.block_ack_states: dict[int, list[int]] = dict()   # coordinator, sender id -> [start_seq, bitmap]
+        self.max_frame_retries = 0                 # retransmissions of a frame whose ACK timed out
+        self.retry_backoff = 0                     # us, doubled for every further retry
+        self.tx_retry_count = 0                    # retransmissions of the current TX frame
+        self.fragmentation = False                 # split a frame that does not fit the rest of the slot
+        self.min_fragment_size = 1                 # bytes, a smaller fragment is not worth a transaction
+        self.frag_parent: Packet | None = None     # frame being sent in fragments
+        self.frag_offset = 0                       # bytes of frag_parent already acknowledged
+        self.frag_number = 0                       # fragment number of the next fragment
+        self.reassembly_sizes: dict[int, int] = dict()   # coordinator, sender id -> bytes received in fragments
 
 
     def set_env(self, env: simpy.Environment):
@@ -98,7 +141,8 @@ class BanMac:
             packet: Packet,
             frame_type: BanFrameType,
             frame_subtype: BanFrameSubType,
-            tx_params: BanTxParams
+            tx_params: BanTxParams,
+            frame_body: Beacon | IAck | Data | None = None
     ):
         assert frame_type is not None
         assert frame_subtype is not None
@@ -114,33 +158,38 @@ class BanMac:
         )
         packet.get_mac_header().set_frame_control(frame_type, frame_subtype, tx_params.tx_option, tx_params.seq_num)
 
-        if frame_subtype == BanFrameSubType.WBAN_MANAGEMENT_BEACON:
-            packet.set_frame_body(Beacon())
-        elif frame_subtype == BanFrameSubType.WBAN_CONTROL_IACK:
-            packet.set_frame_body(IAck())
-        elif frame_subtype == BanFrameSubType.WBAN_DATA_UP0:
-            packet.set_frame_body(Data(0))
-        elif frame_subtype == BanFrameSubType.WBAN_DATA_UP1:
-            packet.set_frame_body(Data(1))
-        elif frame_subtype == BanFrameSubType.WBAN_DATA_UP2:
-            packet.set_frame_body(Data(2))
-        elif frame_subtype == BanFrameSubType.WBAN_DATA_UP3:
-            packet.set_frame_body(Data(3))
-        elif frame_subtype == BanFrameSubType.WBAN_DATA_UP4:
-            packet.set_frame_body(Data(4))
-        elif frame_subtype == BanFrameSubType.WBAN_DATA_UP5:
-            packet.set_frame_body(Data(5))
-        elif frame_subtype == BanFrameSubType.WBAN_DATA_UP6:
-            packet.set_frame_body(Data(6))
-        elif frame_subtype == BanFrameSubType.WBAN_DATA_UP7:
-            packet.set_frame_body(Data(7))
+        frame_body_factory = BanMac.frame_body_factories.get(frame_subtype.value)
+
+        # a prebuilt body (e.g. a cached beacon) is shared as it is
+        if frame_body is not None:
+            packet.set_frame_body(frame_body)
+        elif frame_body_factory is not None:
+            packet.set_frame_body(frame_body_factory())
         else:
             packet.set_frame_body(None)
             print('frame initialization error (invalid frame subtype)')
 
+    @staticmethod
+    def create_tx_queue() -> BanTxQueue:
+        capacity = JSONConfig.get_config("tx_queue_capacity")
+        drop_policy = JSONConfig.get_config("tx_queue_drop_policy")
+        max_age = JSONConfig.get_config("tx_queue_max_age")
+
+        return BanTxQueue(
+            capacity=None if capacity is None else int(capacity),
+            drop_policy=BanQueueDropPolicy.TAIL_DROP if drop_policy is None else BanQueueDropPolicy[drop_policy.upper()],
+            max_age=None if max_age is None else float(max_age)
+        )
+
     def get_tracer(self) -> Tracer:
         return self.tracer
 
+    def set_rx_on_when_idle(self, rx_on_when_idle: bool):
+        self.mac_rx_on_when_idle = rx_on_when_idle
+
+    def is_rx_on_when_idle(self) -> bool:
+        return self.mac_rx_on_when_idle or self.awaiting_beacon
+
     def set_tracer(self, tracer: Tracer):
         self.tracer = tracer
 
@@ -153,10 +202,29 @@ class BanMac:
         self.alloc_start_time = 0
         self.alloc_end_time = 0
         self.beacon_rx_time = 0
-        self.tx_power = 0  # dBm
-        self.initial_energy = 1  # watt
+        tx_power = JSONConfig.get_config("tx_power")
+        self.tx_power = 0 if tx_power is None else float(tx_power)  # dBm
+        self.initial_energy = 2430  # joule, CR2032 coin cell (225 mAh at 3 V)
         self.tracer.set_env(self.env)
         self.tracer.set_initial_energy(self.initial_energy)
+        self.tx_queue.set_env(self.env)
+        self.tx_queue.set_tracer(self.tracer)
+        self.tx_queue.set_drop_handler(self.queue_drop)
+
+        # duty-cycled nodes sleep outside their allocated slot, the coordinator always listens
+        self.mac_rx_on_when_idle = self.sscs.coordinator or not bool(JSONConfig.get_config("use_sleep_scheduling"))
+        self.awaiting_beacon = True
+        self.frame_aggregation = bool(JSONConfig.get_config("use_frame_aggregation"))
+        ack_frame_size = JSONConfig.get_config("ack_frame_size")
+        self.ack_packet_size = int(JSONConfig.get_config("packet_size") if ack_frame_size is None else ack_frame_size)
+        min_fragment_size = JSONConfig.get_config("min_fragment_size")
+        self.fragmentation = bool(JSONConfig.get_config("use_fragmentation"))
+        self.min_fragment_size = 1 if min_fragment_size is None else int(min_fragment_size)
+        self.block_ack = bool(JSONConfig.get_config("use_block_ack"))
+        max_frame_retries = JSONConfig.get_config("mac_max_frame_retries")
+        retry_backoff = JSONConfig.get_config("mac_retry_backoff")
+        self.max_frame_retries = 0 if max_frame_retries is None else int(max_frame_retries)
+        self.retry_backoff = self.pSIFS if retry_backoff is None else float(retry_backoff)
 
         pib_attribute = BanPhyPibAttributes()
         pib_attribute.phy_tx_power = self.tx_power
@@ -164,7 +232,7 @@ class BanMac:
         self.phy.set_attribute_request(BanPibAttributeIdentifier.PHY_TRANSMIT_POWER, pib_attribute)
         self.phy.set_attribute_request(BanPibAttributeIdentifier.PHY_CCA_MODE, pib_attribute)
 
-        if self.mac_rx_on_when_idle is True:
+        if self.is_rx_on_when_idle() is True:
             self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON)
         else:
             self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF)
@@ -177,10 +245,33 @@ class BanMac:
         )
 
 
+    def queue_drop(self, packet: Packet, expired: bool):
+        # a queued packet dropped by the queue policy (HEAD_DROP, EXPIRE), the transaction ends here
+        BanMac.logger.log(
+            sim_time=self.get_env().now,
+            msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] "
+                f"TX queue dropped a queued packet ({'expired' if expired else 'overflow'}).",
+            level=logging.DEBUG
+        )
+        self.get_sscs().data_confirm(
+            BanDataConfirmStatus.IEEE_802_15_6_TRANSACTION_EXPIRED if expired
+            else BanDataConfirmStatus.IEEE_802_15_6_TRANSACTION_OVERFLOW
+        )
+        packet.release()
+
+
     def mlme_data_request(self, tx_packet: Packet):
         self.packet_sent = False
-        # Push the packet into the Tx queue
-        self.tx_queue.put_nowait(tx_packet)
+        # Push the packet into the Tx queue, management frames take the highest priority
+        if self.tx_queue.put_nowait(tx_packet, BanTxQueue.NUM_PRIORITIES - 1) is False:
+            BanMac.logger.log(
+                sim_time=self.get_env().now,
+                msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] TX queue is full, dropping management frame.",
+                level=logging.WARN
+            )
+            self.get_sscs().data_confirm(BanDataConfirmStatus.IEEE_802_15_6_TRANSACTION_OVERFLOW)
+            tx_packet.release()
+            return
 
         event = self.env.event()
         event._ok = True
@@ -200,8 +291,20 @@ class BanMac:
         # )
 
 
-    def mcps_data_request(self, tx_params: BanTxParams, tx_packet: Packet):
-        tx_params.tx_option = BanTxOption.TX_OPTION_ACK
+    def mcps_data_request(self, tx_params: BanTxParams, tx_packet: Packet, priority: int = 0):
+        # user priority UP0 ~ UP7 only, anything else has no data frame subtype and no TX queue
+        if not 0 <= priority < BanTxQueue.NUM_PRIORITIES:
+            BanMac.logger.log(
+                sim_time=self.get_env().now,
+                msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] invalid user priority {priority}, "
+                    + f"dropping packet.",
+                level=logging.WARN
+            )
+            self.get_sscs().data_confirm(BanDataConfirmStatus.IEEE_802_15_6_INVALID_PARAMETER)
+            tx_packet.release()
+            return
+
+        tx_params.tx_option = BanTxOption.TX_OPTION_BACK if self.block_ack is True else BanTxOption.TX_OPTION_ACK
         tx_params.seq_num = self.seq_num
         self.seq_num += 1
 
@@ -217,7 +320,7 @@ class BanMac:
             packet=tx_packet,
             tx_params=tx_params,
             frame_type=BanFrameType.IEEE_802_15_6_MAC_DATA,
-            frame_subtype=BanFrameSubType.WBAN_DATA_UP0
+            frame_subtype=BanFrameSubType(BanFrameSubType.WBAN_DATA_UP0.value + priority)
         )
 
         recipient_id = tx_packet.get_mac_header().recipient_id
@@ -236,8 +339,15 @@ class BanMac:
             level=logging.DEBUG
         )
 
-        # Push the packet into the Tx queue
-        self.tx_queue.put_nowait(tx_packet)
+        # Push the packet into the Tx queue of its user priority
+        if self.tx_queue.put_nowait(tx_packet, priority) is False:
+            BanMac.logger.log(
+                sim_time=self.get_env().now,
+                msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] TX queue is full, dropping packet.",
+                level=logging.DEBUG
+            )
+            self.get_sscs().data_confirm(BanDataConfirmStatus.IEEE_802_15_6_TRANSACTION_OVERFLOW)
+            tx_packet.release()
         # self.check_queue(self.get_env())
 
 
@@ -251,10 +361,27 @@ class BanMac:
 
             tx_header = self.tx_packet.get_mac_header()           # 보냈던 패킷의 헤더
 
-            frame_type = tx_header.get_frame_control().frame_type
+            frame_type = tx_header.get_frame_control().frame_type_code
             ack_policy = tx_header.get_frame_control().ack_policy
 
-            if frame_type == BanFrameType.IEEE_802_15_6_MAC_DATA and ack_policy == BanTxOption.TX_OPTION_ACK:
+            if (frame_type == FRAME_TYPE_DATA and ack_policy == BanTxOption.TX_OPTION_BACK
+                    and tx_header.get_frame_control().last_frame is False):
+                # more frames of the burst follow, the B-ACK at the end of the burst covers this frame
+                self.burst_packets.append(self.tx_packet)
+                self.tx_packet = None
+                self.packet_sent = False
+                self.change_mac_state(BanMacState.MAC_IDLE)
+                if self.is_rx_on_when_idle() is True:
+                    self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON)
+                else:
+                    self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF)
+
+                event = self.env.event()
+                event._ok = True
+                event.callbacks.append(self.check_queue)
+                self.env.schedule(event, priority=0, delay=microseconds(self.pSIFS))
+
+            elif frame_type == FRAME_TYPE_DATA and ack_policy in (BanTxOption.TX_OPTION_ACK, BanTxOption.TX_OPTION_BACK):
                 # 방금 데이터를 보냈고, 추가로 ACK를 보내야 하는 경우
                 # ACK 대기 모드로 돌입
                 self.set_mac_state(BanMacState.MAC_ACK_PENDING)
@@ -270,8 +397,10 @@ class BanMac:
                     self.get_ack_wait_duration() * 1000 * 1000 / self.get_phy().get_data_or_symbol_rate(is_data=False)
                 )
 
-                self.ack_wait_time += (self.get_phy().calc_tx_time(self.tx_packet) * 2)
-                self.ack_wait_time += microseconds(self.get_phy().aTurnaroundTime) * 2 * 2
+                # the recipient answers pSIFS after the end of the data frame with an ACK (or B-ACK) frame,
+                # the wait does not depend on the data frame size, so a long frame still leaves room for a retry
+                self.ack_wait_time += microseconds(self.pSIFS) + self.get_ack_tx_time()
+                self.ack_wait_time += microseconds(self.get_phy().aTurnaroundTime) * 2
 
                 # ACK timeout 이벤트 등록
                 BanMac.logger.log(
@@ -280,10 +409,7 @@ class BanMac:
                     level=logging.DEBUG
                 )
 
-                event = self.env.event()
-                event._ok = True
-                event.callbacks.append(self.ack_wait_timeout)
-                self.env.schedule(event, priority=0, delay=self.ack_wait_time)
+                self.schedule_ack_timeout(self.ack_wait_time)
 
             else:
                 # ACK 수신 대기를 할 필요가 없는 경우 - 비콘 신호 보낸 경우, ACK 확인 메시지 보낸 경우
@@ -291,7 +417,7 @@ class BanMac:
                 mac_header: BanMacHeader = self.tx_packet.get_mac_header()
 
                 # 한 노드로부터 데이터를 수신했고, 이 코디네이터에서 ACK 메시지를 성공적으로 보낸 경우
-                if mac_header.get_frame_control().frame_subtype == BanFrameSubType.WBAN_CONTROL_IACK:
+                if mac_header.get_frame_control().frame_subtype_code in (FRAME_SUBTYPE_IACK, FRAME_SUBTYPE_BACK):
                     self.sscs.data_confirm(
                         BanDataConfirmStatus.IEEE_802_15_6_SUCCESS,
                         node_id=mac_header.recipient_id,
@@ -304,9 +430,9 @@ class BanMac:
 
 
 
-                self.tx_packet = None                                                 # TX 패킷 초기화
+                self.release_tx_packet()                                              # TX 패킷 초기화
                 self.change_mac_state(BanMacState.MAC_IDLE)                           # MAC은 IDLE 모드
-                if self.mac_rx_on_when_idle is True:                                  # 'IDLE시 RX 대기 모드'인 경우
+                if self.is_rx_on_when_idle() is True:                                  # 'IDLE시 RX 대기 모드'인 경우
                     self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON)
                 else:                                                                   # 'IDLE시 TRX 끄기 모드'인 경우
                     self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF)
@@ -378,17 +504,18 @@ class BanMac:
             # Beacon received (note: we consider the management-type frame is a beacon frame)
             # Note: broadcast id is 999
 
-            rx_frame_type = rx_header.get_frame_control().frame_type
+            rx_frame_type = rx_header.get_frame_control().frame_type_code
             rx_recipient_id = rx_header.recipient_id
 
 
             # 1. 비콘 신호인 경우
-            if (rx_frame_type == BanFrameType.IEEE_802_15_6_MAC_MANAGEMENT
+            if (rx_frame_type == FRAME_TYPE_MANAGEMENT
                     and rx_recipient_id == BanRecipientType.IEEE_802_15_6_BROADCAST.value):
                 self.packet_sent = False # 새 비콘 신호 수신 -> 패킷 전송 여부 플래그 초기화
                 # 수신한 비콘 신호의 남은 할당 시간 계산
                 self.beacon_rx_time = self.get_env().now
-                assigned_link: AssignedLinkElement = rx_packet.get_frame_body().get_assigned_link_info(self.mac_params.node_id)
+                self.awaiting_beacon = False
+                assigned_links = rx_packet.get_frame_body().get_assigned_links(self.mac_params.node_id)
 
                 BanMac.logger.log(
                     sim_time=self.get_env().now,
@@ -398,48 +525,34 @@ class BanMac:
                 )
 
                 # 비콘 신호와 연결이 제대로 된 경우
-                if assigned_link is not None:
+                if assigned_links:
                     # PIB attribute 업데이트(링크 품질)
-                    pib_attribute = BanPhyPibAttributes()
-                    pib_attribute.phy_tx_power = assigned_link.tx_power
+                    pib_attribute = pib_attributes_pool.acquire()
+                    pib_attribute.phy_tx_power = assigned_links[0].tx_power
                     self.get_phy().set_attribute_request(BanPibAttributeIdentifier.PHY_TRANSMIT_POWER, pib_attribute)
+                    pib_attributes_pool.release(pib_attribute)
 
                     # 비콘 신호와 동기화
-                    self.alloc_start_time = assigned_link.interval_start
-                    self.alloc_end_time = assigned_link.interval_end
-
-                    # TDMA 슬롯 기간 계산
-                    slot_duration = (
-                            self.mAllocationSlotLength * self.pAllocationSlotResolution
-                            + self.pAllocationSlotMin
-                    )
-
-                    tx_start_time = microseconds(self.alloc_start_time * slot_duration) + microseconds(self.pSIFS)
-                    tx_timeout = (
-                            microseconds(self.alloc_start_time * slot_duration)
-                            + microseconds(self.alloc_end_time * slot_duration)
-                    )
-
-                    self.alloc_start_time = tx_start_time
-                    self.alloc_end_time = tx_timeout
-                    self.time_slot_index = assigned_link.time_slot_index
-
-
-                    BanMac.logger.log(
-                        sim_time=self.get_env().now,
-                        msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] "
-                            f"time slot: {self.time_slot_index} "
-                            f"alloc start: {self.alloc_start_time + + self.env.now:.6f}, "
-                            f"alloc end: {self.alloc_end_time + + self.env.now:.6f}"
-                            f"!!! {self.alloc_start_time}",
-                        level=logging.INFO
-                    )
+                    self.set_allocation(assigned_links[0])
 
                     event = self.env.event()
                     event._ok = True
                     event.callbacks.append(self.check_queue)
 
                     self.env.schedule(event, priority=0, delay=self.alloc_start_time)
+                    self.random_access = False
+
+                    # 같은 노드에 할당된 다음 슬롯들은 각 슬롯이 시작될 때 이어받음
+                    for assigned_link in assigned_links[1:]:
+                        event = self.env.event()
+                        event._ok = True
+                        event.callbacks.append(lambda _, link=assigned_link: self.start_allocation(link))
+                        self.env.schedule(event, priority=0, delay=self.get_allocation_times(assigned_link)[0])
+
+                # 할당된 슬롯이 없으면 RAP에서 경쟁(slotted CSMA/CA)
+                elif rx_packet.get_frame_body().has_rap():
+                    self.contend_in_rap(rx_packet.get_frame_body())
+
                 else:
                     BanMac.logger.log(
                         sim_time=self.env.now,
@@ -448,15 +561,30 @@ class BanMac:
                         level=logging.WARN
                     )
 
+                # 할당 슬롯 밖에서는 수신기를 끄고, 다음 비콘 직전에 깨어남
+                if self.mac_rx_on_when_idle is False:
+                    self.schedule_beacon_wake_up(rx_packet)
+
+                    if self.mac_state == BanMacState.MAC_IDLE:
+                        self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF)
+
             # for further processing the received control or data-type frame
-            self.rx_packet = rx_packet
             mac_state = self.mac_state
             rx_ack_policy = rx_header.get_frame_control().ack_policy
 
             # 2. 데이터 신호인 경우
-            if rx_frame_type == BanFrameType.IEEE_802_15_6_MAC_DATA:
+            if rx_frame_type == FRAME_TYPE_DATA:
+                # kept until the ACK is sent, the SSCS sink only reads it
+                self.rx_packet = rx_packet
+
                 # if it is a data frame, push it up the stack
-                self.get_sscs().data_indication(self.rx_packet)
+                frame_body = rx_packet.get_frame_body()
+                if isinstance(frame_body, AggregateData):
+                    # the sender keeps its packets until the ACK and the sink does not keep them
+                    for packet in frame_body.packets:
+                        self.get_sscs().data_indication(packet)
+                elif self.reassemble(rx_packet) is True:
+                    self.get_sscs().data_indication(self.rx_packet)
 
                 # if this is a data or management-type frame, which is not a broadcast,
                 # generate and send an ACK frame.
@@ -470,10 +598,27 @@ class BanMac:
                         msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] NO ACK received.",
                         level=logging.WARN
                     )
-                    self.tx_packet = None
+                    self.release_tx_packet()
                     self.set_mac_state(BanMacState.MAC_IDLE)
                     self.get_sscs().data_confirm(BanDataConfirmStatus.IEEE_802_15_6_NO_ACK)
 
+                # 블록 ACK 정책인 경우: 버스트의 마지막 프레임을 받으면 B-ACK 보냄
+                if rx_ack_policy == BanTxOption.TX_OPTION_BACK:
+                    self.record_block_ack(rx_header)
+
+                    if isinstance(frame_body, AggregateData):
+                        self.rx_packet.release()
+                        self.rx_packet = None
+
+                    if rx_header.get_frame_control().last_frame is True:
+                        event = self.env.event()
+                        event._ok = True
+                        event.callbacks.append(
+                            lambda _, sender_id=rx_header.sender_id, time_slot_index=rx_header.time_slot_index:
+                            self.send_block_ack(sender_id, time_slot_index)
+                        )
+                        self.env.schedule(event, priority=0, delay=(self.pSIFS * 0.000001))
+
                 # ACK PENDING 상태가 아닐 때 데이터를 받은 경우: ACK 보냄
                 if rx_ack_policy == BanTxOption.TX_OPTION_ACK:
                     self.change_mac_state(BanMacState.MAC_IDLE)
@@ -483,7 +628,7 @@ class BanMac:
                     self.env.schedule(event, priority=0, delay=(self.pSIFS * 0.000001))
 
             # 3. 제어 신호이며 ACK_PENDING 상태인 경우
-            elif rx_frame_type == BanFrameType.IEEE_802_15_6_MAC_CONTROL and mac_state == BanMacState.MAC_ACK_PENDING:
+            elif rx_frame_type == FRAME_TYPE_CONTROL and mac_state == BanMacState.MAC_ACK_PENDING:
                 # if self.tx_packet is None:
                 #     raise Exception("packet is none")
 
@@ -491,24 +636,33 @@ class BanMac:
                 # finish the transmission and notify the upper layer
                 tx_header = self.tx_packet.get_mac_header()
 
-                if rx_header.get_frame_control().sequence_number == tx_header.get_frame_control().sequence_number:
+                if rx_header.get_frame_control().frame_subtype_code == FRAME_SUBTYPE_BACK:
+                    self.receive_block_ack(rx_packet.get_frame_body())
+
+                elif rx_header.get_frame_control().sequence_number == tx_header.get_frame_control().sequence_number:
                     BanMac.logger.log(
                         sim_time=self.get_env().now,
                         msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] received ACK message.",
                         level=logging.DEBUG
                     )
                     # if the packet that just sent before is a data frame
-                    if tx_header.get_frame_control().frame_type == BanFrameType.IEEE_802_15_6_MAC_DATA:
-                        # update trace info
-                        self.get_tracer().add_success_tx_packet(self.tx_packet)
+                    if tx_header.get_frame_control().frame_type_code == FRAME_TYPE_DATA:
+                        if tx_header.get_frame_control().non_final_frag is True:
+                            # more fragments follow, the frame is confirmed with its last fragment
+                            self.release_fragment()
+
+                        else:
+                            # update trace info, an aggregate frame is acknowledged for every packet it carries
+                            tx_frame = self.frag_parent if self.frag_parent is not None else self.tx_packet
+                            for packet in self.get_frame_packets(tx_frame):
+                                self.get_tracer().add_success_tx_packet(packet)
+                                self.sscs.data_confirm(BanDataConfirmStatus.IEEE_802_15_6_SUCCESS)
 
-                        self.sscs.data_confirm(BanDataConfirmStatus.IEEE_802_15_6_SUCCESS)
+                            self.release_tx_packet()
 
                         # Prepare the next transmission
-                        self.tx_packet = None
-                        self.prev_tx_status = True    # mark the current Tx result as a success
                         self.change_mac_state(BanMacState.MAC_IDLE)
-                        if self.mac_rx_on_when_idle is True:
+                        if self.is_rx_on_when_idle() is True:
                             self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON)
                         else:
                             self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF)
@@ -525,11 +679,18 @@ class BanMac:
                         msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] ERROR PROCESSING RX PACKET: COUNTER ERROR",
                         level=logging.FATAL
                     )
-                    self.prev_tx_status = False   # mark the current Tx result as a fail
                     self.sscs.data_confirm(BanDataConfirmStatus.IEEE_802_15_6_COUNTER_ERROR)
 
+            # the receive path is done with the frame, unless a data frame still waits for its ACK (send_ack)
+            if rx_frame_type != FRAME_TYPE_DATA:
+                rx_packet.release()
+            elif self.rx_packet is rx_packet and rx_ack_policy != BanTxOption.TX_OPTION_ACK:
+                self.rx_packet.release()
+                self.rx_packet = None
+
         else:
             # accept_frame = False -> return
+            rx_packet.release()
             return
             # print("error")
 
@@ -545,14 +706,6 @@ class BanMac:
             # Cond 2) if the expected Tx time is over the remain allocation intervals
             # Cond 3) if the remain allocation interval is lower than the minimum time slot unit
 
-            slot_duration = self.pAllocationSlotMin + self.mAllocationSlotLength * self.pAllocationSlotResolution
-            guard_time = microseconds(self.pSIFS + self.pExtraIFS + self.mClockResolution)
-            expected_tx_time = self.get_phy().calc_tx_time(self.tx_packet)
-            remain_alloc_time = ((self.alloc_end_time - self.alloc_start_time) -
-                                 (self.get_env().now - self.beacon_rx_time - self.alloc_start_time))
-
-            ack_rx_time = self.get_phy().calc_tx_time(self.tx_packet)
-
             tx_header = self.tx_packet.get_mac_header()
             tx_frame_type = tx_header.get_frame_control().frame_type
 
@@ -586,18 +739,21 @@ class BanMac:
                 #     level=logging.DEBUG
                 # )
 
-                if (microseconds(slot_duration) >= remain_alloc_time or
-                        (expected_tx_time + guard_time + ack_rx_time) >= remain_alloc_time):
-
+                if self.fits_in_allocation(self.tx_packet, self.get_env().now) is False:
                     BanMac.logger.log(
                         sim_time=self.get_env().now,
-                        msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] (remain_alloc: {remain_alloc_time}, {expected_tx_time + guard_time + ack_rx_time}, {microseconds(slot_duration)}) no remaining time left, TX failed.",
+                        msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] (remain_alloc: {self.slot_plan.end - self.get_env().now}) no remaining time left, TX failed.",
                         level=logging.WARN
                     )
 
+                    # the burst can not be finished in this allocation, the pending frame starts a new one later
+                    if self.burst_packets:
+                        self.drop_burst_packets()
+                        tx_header.get_frame_control().last_frame = True
+
                     self.change_mac_state(BanMacState.MAC_IDLE)
 
-                    if self.mac_rx_on_when_idle is True:
+                    if self.is_rx_on_when_idle() is True:
                         self.get_phy().set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON)
 
                     else:
@@ -667,18 +823,381 @@ class BanMac:
             ),
             level=logging.DEBUG
         )
-        if self.mac_state == BanMacState.MAC_IDLE and self.tx_queue.empty() is False and self.tx_packet is None:
+        if self.mac_state == BanMacState.MAC_IDLE and self.frag_parent is not None and self.tx_packet is None:
+            # the rest of a fragmented frame goes first
+            self.frag_parent.mac_header.time_slot_index = self.time_slot_index
+            self.tx_packet = self.next_fragment(self.frag_parent)
+            if self.tx_packet is None:
+                return
+
+            self.change_mac_state(BanMacState.MAC_SENDING)
+            self.get_phy().set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON)
+
+        elif self.mac_state == BanMacState.MAC_IDLE and self.tx_queue.empty() is False and self.tx_packet is None:
             self.tx_packet: Packet = self.tx_queue.get_nowait()
             # mac_header: BanMacHeader = self.tx_packet.get_mac_header()
             self.tx_packet.mac_header.time_slot_index = self.time_slot_index
+
+            if self.frame_aggregation is True and self.random_access is False:
+                self.tx_packet = self.aggregate_frames(self.tx_packet)
+
+            # data fragments are acknowledged one by one, a B-ACK burst or a RAP frame is sent whole
+            if (self.fragmentation is True and self.random_access is False and self.block_ack is False
+                    and self.tx_packet.get_mac_header().get_frame_control().frame_type_code == FRAME_TYPE_DATA):
+                self.tx_packet = self.next_fragment(self.tx_packet)
+                if self.tx_packet is None:
+                    return
+
+            if self.block_ack is True:
+                # burst frames are numbered consecutively for the B-ACK bitmap, a RAP frame is a burst on its own
+                frame_control = self.tx_packet.get_mac_header().get_frame_control()
+                frame_control.sequence_number = self.burst_seq_num
+                frame_control.last_frame = self.random_access is True or self.can_continue_burst() is False
+                self.burst_seq_num += 1
+
+            if self.random_access is True:
+                self.set_mac_state(BanMacState.MAC_CSMA)
+                return
+
             self.change_mac_state(BanMacState.MAC_SENDING)
             self.get_phy().set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON)
 
 
+    def aggregate_frames(self, first_packet: Packet) -> Packet:
+        """
+        pack the queued frames that fit before the end of the allocation into one aggregate frame
+        :param first_packet: the frame just taken from the TX queue
+        :return: first_packet itself if nothing else fits, otherwise an aggregate frame with a single MAC header
+        """
+        tx_time_budget = self.slot_plan.ack_deadline - self.get_env().now
+
+        packets = [first_packet]
+        aggregate_size = first_packet.get_size()
+
+        while self.tx_queue.empty() is False:
+            next_size = aggregate_size + self.tx_queue.peek().get_size()
+            if self.get_phy().calc_tx_time_by_size(next_size) >= tx_time_budget:
+                break
+
+            packets.append(self.tx_queue.get_nowait())
+            aggregate_size = next_size
+
+        if len(packets) == 1:
+            return first_packet
+
+        aggregate = Packet.acquire(aggregate_size)
+        aggregate.size = aggregate_size
+        aggregate.get_mac_header().copy_from(first_packet.get_mac_header())
+        aggregate.set_frame_body(AggregateData(first_packet.get_frame_body().priority, packets))
+
+        BanMac.logger.log(
+            sim_time=self.get_env().now,
+            msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] aggregated {len(packets)} frames, "
+                f"{aggregate_size} bytes.",
+            level=logging.DEBUG
+        )
+
+        return aggregate
+
+
+    @staticmethod
+    def get_frame_packets(frame: Packet) -> list[Packet]:
+        # the packets carried by a data frame
+        frame_body = frame.get_frame_body()
+        if isinstance(frame_body, AggregateData):
+            return frame_body.packets
+
+        return [frame]
+
+
+    def get_ack_tx_time(self) -> float:
+        return self.get_phy().calc_tx_time_by_size(self.ack_packet_size)
+
+
+    @staticmethod
+    def release_frame(frame: Packet):
+        frame_body = frame.get_frame_body()
+        if isinstance(frame_body, AggregateData):
+            for packet in frame_body.packets:
+                packet.release()
+
+        frame.release()
+
+
+    def release_tx_packet(self):
+        # the MAC is done with the current TX packet (ACKed, sent without ACK or dropped)
+        self.cancel_ack_timeout()
+        self.tx_retry_count = 0
+
+        if self.tx_packet is not None:
+            self.release_frame(self.tx_packet)
+            self.tx_packet = None
+
+        # the frame a fragment was cut from ends with it
+        if self.frag_parent is not None:
+            self.release_frame(self.frag_parent)
+            self.frag_parent = None
+            self.frag_offset = 0
+            self.frag_number = 0
+
+        # the earlier frames of a burst share the fate of its last frame
+        self.drop_burst_packets()
+
+
+    def release_fragment(self):
+        # an acknowledged non-final fragment, the next one continues from where it ended
+        self.cancel_ack_timeout()
+        self.tx_retry_count = 0
+        self.frag_offset += self.tx_packet.get_size()
+        self.tx_packet.release()
+        self.tx_packet = None
+
+
+    def is_retransmission(self) -> bool:
+        # the packets of the current TX frame were already counted (retried frame or a later fragment)
+        return self.tx_retry_count > 0 or self.frag_offset > 0
+
+
+    def next_fragment(self, frame: Packet) -> Packet | None:
+        """
+        cut the next fragment of a frame so that it and its ACK fit in the rest of the allocation
+        :param frame: data frame taken from the TX queue, or the frame being fragmented
+        :return: frame itself if it fits unfragmented, a fragment, or None if not even a minimum fragment fits,
+                 the frame then waits in frag_parent for the next allocation
+        """
+        now = self.get_env().now
+        remaining = frame.get_size() - self.frag_offset
+        max_size = 0
+
+        if now < self.slot_plan.tx_deadline:
+            max_size = self.get_phy().calc_max_size_by_tx_time(self.slot_plan.ack_deadline - now)
+
+        if self.frag_offset == 0 and remaining <= max_size:
+            self.frag_parent = None
+            return frame
+
+        self.frag_parent = frame
+
+        size = min(remaining, max_size)
+        if size < remaining and size < self.min_fragment_size:
+            return None
+
+        fragment = Packet.acquire(size)
+        fragment.get_mac_header().copy_from(frame.get_mac_header())
+        fragment.set_frame_body(frame.get_frame_body())
+
+        frame_control = fragment.get_mac_header().get_frame_control()
+        frame_control.frag_number = self.frag_number
+        frame_control.non_final_frag = self.frag_offset + size < frame.get_size()
+
+        self.frag_number += 1
+
+        BanMac.logger.log(
+            sim_time=now,
+            msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] fragment {frame_control.frag_number}: "
+                f"{self.frag_offset}~{self.frag_offset + size} of {frame.get_size()} bytes.",
+            level=logging.DEBUG
+        )
+
+        return fragment
+
+
+    def reassemble(self, rx_packet: Packet) -> bool:
+        """
+        coordinator: add a received fragment to its sender's frame
+        :param rx_packet: received data frame
+        :return: True if rx_packet completes a frame, its size is then the size of the whole frame
+        """
+        frame_control = rx_packet.get_mac_header().get_frame_control()
+        sender_id = rx_packet.get_mac_header().sender_id
+
+        if frame_control.frag_number is None:
+            return True
+
+        if frame_control.frag_number == 0:
+            self.reassembly_sizes[sender_id] = 0
+
+        if frame_control.non_final_frag is True:
+            self.reassembly_sizes[sender_id] = self.reassembly_sizes.get(sender_id, 0) + rx_packet.get_size()
+            return False
+
+        rx_packet.size += self.reassembly_sizes.pop(sender_id, 0)
+        return True
+
+
+    def drop_burst_packets(self):
+        # frames of a burst that will never be covered by a B-ACK
+        for frame in self.burst_packets:
+            self.sscs.data_confirm(BanDataConfirmStatus.IEEE_802_15_6_NO_ACK)
+            self.release_frame(frame)
+
+        self.burst_packets.clear()
+
+
+    def can_continue_burst(self) -> bool:
+        """
+        check whether the next queued frame can follow the current TX frame in the same allocation,
+        with the conditions set_trx_state_confirm applies when that frame is sent
+        """
+        next_packet = self.tx_queue.peek()
+        if next_packet is None:
+            return False
+
+        # the next frame starts a SIFS after the current one
+        start_time = self.get_env().now + self.get_phy().calc_tx_time(self.tx_packet) + microseconds(self.pSIFS)
+
+        return self.fits_in_allocation(next_packet, start_time)
+
+
+    def get_allocation_times(self, assigned_link: AssignedLinkElement) -> tuple[float, float]:
+        # TX start and end of an allocated slot, seconds from the beacon
+        slot_duration = (
+                self.mAllocationSlotLength * self.pAllocationSlotResolution
+                + self.pAllocationSlotMin
+        )
+
+        tx_start_time = microseconds(assigned_link.interval_start * slot_duration) + microseconds(self.pSIFS)
+        tx_timeout = (
+                microseconds(assigned_link.interval_start * slot_duration)
+                + microseconds(assigned_link.interval_end * slot_duration)
+        )
+
+        return tx_start_time, tx_timeout
+
+
+    def set_allocation(self, assigned_link: AssignedLinkElement):
+        self.alloc_start_time, self.alloc_end_time = self.get_allocation_times(assigned_link)
+        self.time_slot_index = assigned_link.time_slot_index
+        self.compile_slot_plan()
+
+        BanMac.logger.log(
+            sim_time=self.get_env().now,
+            msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] "
+                f"time slot: {self.time_slot_index} "
+                f"alloc start: {self.slot_plan.start:.6f}, "
+                f"alloc end: {self.slot_plan.end:.6f}",
+            level=logging.INFO
+        )
+
+
+    def start_allocation(self, assigned_link: AssignedLinkElement):
+        # a further slot of this node in the same beacon interval starts now
+        self.set_allocation(assigned_link)
+        self.packet_sent = False
+        self.check_queue(self.env)
+
+
+    def compile_slot_plan(self):
+        # alloc_start_time and alloc_end_time are relative to the beacon, the plan holds absolute times
+        plan = self.slot_plan
+        plan.start = self.beacon_rx_time + self.alloc_start_time
+        plan.end = self.beacon_rx_time + self.alloc_end_time
+        plan.tx_deadline = plan.end - self.mMinSlotDuration
+        plan.ack_deadline = plan.end - self.mGuardTime - self.get_ack_tx_time()
+
+
+    def fits_in_allocation(self, packet: Packet, start_time: float) -> bool:
+        """
+        check whether a data frame sent at start_time and its ACK fit in the current allocation
+        :param packet: data frame to be sent
+        :param start_time: time the transmission starts
+        :return: False if the remaining allocation is shorter than the minimum slot or the transaction
+        """
+        return self.slot_plan.fits(start_time, self.get_phy().calc_tx_time(packet))
+
+
+    def record_block_ack(self, rx_header: BanMacHeader):
+        # coordinator: mark the received frame in the bitmap of its sender's burst
+        sequence_number = rx_header.get_frame_control().sequence_number
+        state = self.block_ack_states.get(rx_header.sender_id)
+
+        if state is None or sequence_number < state[0] or sequence_number - state[0] >= 64:
+            state = [sequence_number, 0]
+            self.block_ack_states[rx_header.sender_id] = state
+
+        state[1] |= 1 << (sequence_number - state[0])
+
+
+    def receive_block_ack(self, block_ack: BlockAck):
+        BanMac.logger.log(
+            sim_time=self.get_env().now,
+            msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] received B-ACK, bitmap: {block_ack.bitmap:b}",
+            level=logging.DEBUG
+        )
+
+        for frame in self.burst_packets + [self.tx_packet]:
+            acknowledged = block_ack.is_acknowledged(frame.get_mac_header().get_frame_control().sequence_number)
+
+            for packet in self.get_frame_packets(frame):
+                if acknowledged:
+                    self.get_tracer().add_success_tx_packet(packet)
+                    self.sscs.data_confirm(BanDataConfirmStatus.IEEE_802_15_6_SUCCESS)
+                else:
+                    self.sscs.data_confirm(BanDataConfirmStatus.IEEE_802_15_6_NO_ACK)
+
+            self.release_frame(frame)
+
+        self.burst_packets.clear()
+        self.tx_packet = None
+        self.tx_retry_count = 0
+        self.cancel_ack_timeout()
+
+        # Prepare the next transmission
+        self.change_mac_state(BanMacState.MAC_IDLE)
+        if self.is_rx_on_when_idle() is True:
+            self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON)
+        else:
+            self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF)
+
+        event = self.env.event()
+        event._ok = True
+        event.callbacks.append(self.check_queue)
+        self.get_env().schedule(event, priority=NORMAL, delay=self.pSIFS * 0.000001)
+
+
+    def contend_in_rap(self, beacon: Beacon):
+        # the RAP is the allocation interval of a node without a slot
+        self.alloc_start_time = beacon.rap_start
+        self.alloc_end_time = beacon.rap_end
+        self.time_slot_index = None
+        self.random_access = True
+        self.compile_slot_plan()
+
+        self.csma_ca.set_slotted_csma_ca()
+        self.csma_ca.set_superframe(
+            BanSuperframe(
+                beacon_time=self.beacon_rx_time,
+                rap_start=self.beacon_rx_time + beacon.rap_start,
+                rap_end=self.beacon_rx_time + beacon.rap_end,
+                backoff_slot=self.csma_ca.get_backoff_slot_length()
+            )
+        )
+
+        BanMac.logger.log(
+            sim_time=self.get_env().now,
+            msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] no time slot, "
+                f"contending in RAP: {self.alloc_start_time + self.env.now:.6f} ~ {self.alloc_end_time + self.env.now:.6f}",
+            level=logging.INFO
+        )
+
+        event = self.env.event()
+        event._ok = True
+        event.callbacks.append(self.check_queue)
+        self.env.schedule(event, priority=0, delay=self.alloc_start_time)
+
+
+    def get_transaction_time(self, packet: Packet) -> float:
+        # frame TX time + guard time + ACK RX time
+        return (
+                self.get_phy().calc_tx_time(packet) + self.get_ack_tx_time()
+                + microseconds(self.pSIFS + self.pExtraIFS + self.mClockResolution)
+        )
+
+
     def set_mac_state(self, mac_state: BanMacState):
         if mac_state == BanMacState.MAC_IDLE:
             self.change_mac_state(BanMacState.MAC_IDLE)
-            if self.mac_rx_on_when_idle is True:
+            if self.is_rx_on_when_idle() is True:
                 self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON)
             else:
                 self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF)
@@ -693,7 +1212,7 @@ class BanMac:
 
         # CSMA/CA conditions
         elif mac_state == BanMacState.MAC_CSMA:
-            if self.mac_state != BanMacState.MAC_IDLE or self.mac_state != BanMacState.MAC_ACK_PENDING:
+            if self.mac_state != BanMacState.MAC_IDLE and self.mac_state != BanMacState.MAC_ACK_PENDING:
                 raise Exception("Fatal error: CSMA/CA")
 
             self.change_mac_state(BanMacState.MAC_CSMA)
@@ -710,8 +1229,13 @@ class BanMac:
                     + f"I couldn't find any clear channel, dropping TX packet.",
                 level=logging.WARN
             )
-            self.tx_packet = None
+            self.release_tx_packet()
             self.change_mac_state(BanMacState.MAC_IDLE)
+            if self.is_rx_on_when_idle() is True:
+                self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON)
+            else:
+                self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF)
+            self.sscs.data_confirm(BanDataConfirmStatus.IEEE_802_15_6_CHANNEL_ACCESS_FAILURE)
 
 
     def send_ack(self, event:simpy.Environment):
@@ -725,8 +1249,8 @@ class BanMac:
             level=logging.DEBUG
         )
 
-        ack_packet = Packet(packet_size=int(JSONConfig.get_config("packet_size")))
-        tx_params = BanTxParams()
+        ack_packet = Packet.acquire(packet_size=self.ack_packet_size)
+        tx_params = tx_params_pool.acquire()
         tx_params.ban_id = self.mac_params.ban_id
         tx_params.node_id = self.mac_params.node_id
         tx_params.recipient_id = self.rx_packet.get_mac_header().sender_id
@@ -747,6 +1271,11 @@ class BanMac:
             frame_type=BanFrameType.IEEE_802_15_6_MAC_CONTROL,
             frame_subtype=BanFrameSubType.WBAN_CONTROL_IACK
         )
+        tx_params_pool.release(tx_params)
+
+        # the SSCS sink has read the received frame, it is done
+        self.rx_packet.release()
+        self.rx_packet = None
 
         # Enqueue the ACK packet for further processing when the transceiver is activated
         self.tx_packet = ack_packet
@@ -756,13 +1285,125 @@ class BanMac:
         self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON)
 
 
-    def ack_wait_timeout(self, event: simpy.Environment):
-        # Check whether this timeout is called for previous tx packet or called for current tx packet
-        if self.prev_tx_status is True:
-            self.prev_tx_status = False   # this flag will be turned on when the node receives a corresponding Ack
+    def send_block_ack(self, sender_id: int, time_slot_index: int | None):
+        if self.mac_state != BanMacState.MAC_IDLE:
+            raise Exception(f"Fatal error: invaild MAC state: {self.mac_state.name}")
+
+        start_seq, bitmap = self.block_ack_states.pop(sender_id, (0, 0))
+
+        BanMac.logger.log(
+            sim_time=self.get_env().now,
+            msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] "
+                + f"sending B-ACK packet to: {sender_id}, bitmap: {bitmap:b}",
+            level=logging.DEBUG
+        )
+
+        back_packet = Packet.acquire(packet_size=self.ack_packet_size)
+        tx_params = tx_params_pool.acquire()
+        tx_params.ban_id = self.mac_params.ban_id
+        tx_params.node_id = self.mac_params.node_id
+        tx_params.recipient_id = sender_id
+        tx_params.tx_option = BanTxOption.TX_OPTION_NONE
+        tx_params.seq_num = start_seq
+        tx_params.time_slot_info = time_slot_index
+        self.time_slot_index = time_slot_index
+
+        self.set_mac_header(
+            packet=back_packet,
+            tx_params=tx_params,
+            frame_type=BanFrameType.IEEE_802_15_6_MAC_CONTROL,
+            frame_subtype=BanFrameSubType.WBAN_CONTROL_BACK
+        )
+        tx_params_pool.release(tx_params)
+
+        block_ack: BlockAck = back_packet.get_frame_body()
+        block_ack.start_seq = start_seq
+        block_ack.bitmap = bitmap
+
+        # one B-ACK acknowledges the whole burst
+        self.tx_packet = back_packet
+        self.change_mac_state(BanMacState.MAC_SENDING)
+        self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON)
+
+
+    def schedule_beacon_wake_up(self, beacon: Packet):
+        # the next beacon is sent one beacon interval after the received one and takes the same time to receive
+        wake_up_delay = (
+                beacon.get_frame_body().beacon_interval
+                - self.get_phy().calc_tx_time(beacon)
+                - microseconds(self.mBeaconWakeUpGuard)
+        )
+
+        event = self.env.event()
+        event._ok = True
+        event.callbacks.append(self.beacon_wake_up)
+        self.env.schedule(event, priority=0, delay=max(wake_up_delay, 0))
+
+
+    def beacon_wake_up(self, event: simpy.Environment):
+        self.awaiting_beacon = True
+
+        BanMac.logger.log(
+            sim_time=self.get_env().now,
+            msg=f"{self.__class__.__name__}[{self.mac_params.node_id}] waking up for the next beacon.",
+            level=logging.DEBUG
+        )
+
+        # a node in the middle of a transaction turns the receiver on when it goes idle
+        if self.mac_state == BanMacState.MAC_IDLE:
+            self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON)
+
+
+    def schedule_ack_timeout(self, delay: float):
+        # only one transaction waits for an ACK at a time
+        self.cancel_ack_timeout()
+
+        event = self.env.event()
+        event._ok = True
+        event.callbacks.append(self.ack_wait_timeout)
+        self.env.schedule(event, priority=0, delay=delay)
+        self.ack_timeout_event = event
+
+
+    def cancel_ack_timeout(self):
+        # a scheduled SimPy event can not be taken out of the event queue,
+        # without callbacks it is popped without calling ack_wait_timeout
+        if self.ack_timeout_event is not None:
+            self.ack_timeout_event.callbacks.clear()
+            self.ack_timeout_event = None
+
+
+    def ack_wait_timeout(self, event: simpy.Event):
+        # a timer of an earlier transaction is never confused with the current one
+        if event is not self.ack_timeout_event:
             return
 
-        if self.mac_state == BanMacState.MAC_ACK_PENDING:
+        self.ack_timeout_event = None
+
+        if self.mac_state == BanMacState.MAC_ACK_PENDING and self.can_retry() is True:
+            self.tx_retry_count += 1
+            self.get_tracer().add_retry()
+
+            BanMac.logger.log(
+                sim_time=self.get_env().now,
+                level=logging.DEBUG,
+                msg=f"{self.__class__.__name__}[{self.mac_params.node_id}]: "
+                    + f"ACK timed out, retransmission {self.tx_retry_count}/{self.max_frame_retries}."
+            )
+
+            # keep the TX packet and send it again after the backoff
+            self.change_mac_state(BanMacState.MAC_IDLE)
+            if self.is_rx_on_when_idle() is True:
+                self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON)
+            else:
+                self.phy.set_trx_state_request(BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF)
+
+            event = self.env.event()
+            event._ok = True
+            event.callbacks.append(self.start_tx)
+            self.env.schedule(event, priority=0, delay=self.get_retry_backoff(self.tx_retry_count))
+
+        elif self.mac_state == BanMacState.MAC_ACK_PENDING:
             BanMac.logger.log(
                 sim_time=self.get_env().now,
                 level=logging.WARN,
@@ -771,7 +1412,7 @@ class BanMac:
             )
 
             # Simply drop the pending packet
-            self.tx_packet = None
+            self.release_tx_packet()
             self.set_mac_state(BanMacState.MAC_IDLE)
             self.sscs.data_confirm(BanDataConfirmStatus.IEEE_802_15_6_NO_ACK)
         else:
@@ -779,6 +1420,24 @@ class BanMac:
             pass
 
 
+    def get_retry_backoff(self, retry_count: int) -> float:
+        # the backoff doubles with every retransmission of the same frame
+        return microseconds(self.retry_backoff * 2 ** (retry_count - 1))
+
+
+    def can_retry(self) -> bool:
+        """
+        check whether the timed out frame can be sent again in this allocation,
+        a RAP frame is not retransmitted since its next attempt needs a new contention
+        """
+        if self.tx_retry_count >= self.max_frame_retries or self.random_access is True or self.tx_packet is None:
+            return False
+
+        start_time = self.get_env().now + self.get_retry_backoff(self.tx_retry_count + 1)
+
+        return self.fits_in_allocation(self.tx_packet, start_time)
+
+
     def set_attribute_confirm(self, status, attribute_id):
         # print('set_attribute_confirm:', status, attribute_id)
         pass
@@ -790,7 +1449,12 @@ class BanMac:
             "enqueued": 0,
             "success": 0,
             "throughput": 0,
-            "energy_cosumption_r": 0
+            "energy_cosumption_r": 0,
+            "energy_per_bit_uj": 0,
+            "avg_queue_length": 0,
+            "queue_drop": 0,
+            "retries": 0,
+            **{f"latency_up{i}_ms": 0 for i in range(BanTxQueue.NUM_PRIORITIES)}
         }
 
         if total is False:
@@ -799,6 +1463,12 @@ class BanMac:
             result["success"] = self.get_tracer().get_success_packet_count()
             result["throughput"] = round(self.get_tracer().get_throughput() / 1000, 3)
             result["energy_cosumption_r"] = round(self.get_tracer().get_energy_consumption_ratio(), 3)
+            result["energy_per_bit_uj"] = round(self.get_tracer().get_energy_per_bit() * 1000 * 1000, 3)
+            result["avg_queue_length"] = round(self.get_tracer().get_average_queue_length(), 3)
+            result["queue_drop"] = self.get_tracer().get_queue_drop_count()
+            result["retries"] = self.get_tracer().get_retry_count()
+            for i in range(BanTxQueue.NUM_PRIORITIES):
+                result[f"latency_up{i}_ms"] = round(self.get_tracer().get_average_queue_latency(i) * 1000, 3)
 
             output = (
                 f"NODE ID: {self.get_mac_params().node_id}\t"
@@ -807,7 +1477,8 @@ class BanMac:
                 f"TRANSACTIONS: {self.get_tracer().get_transaction_count():5d}\t"
                 f'Packet DELIVERY RATIO: {round(self.get_tracer().get_pkt_delivery_ratio(), 2) * 100:.3f}%\t'
                 f"THROUGHPUT: {round(self.get_tracer().get_throughput() / 1000, 3):.3f} kbps\t"
-                f"ENERGY CONSUMPTION RATIO: {round(self.get_tracer().get_energy_consumption_ratio(), 3):.3f}%\n"
+                f"ENERGY CONSUMPTION RATIO: {round(self.get_tracer().get_energy_consumption_ratio(), 3):.3f}%\t"
+                f"ENERGY PER BIT: {result['energy_per_bit_uj']:.3f} uJ\n"
             )
 
         else:
@@ -816,6 +1487,12 @@ class BanMac:
             result["success"] = self.get_tracer().get_success_packet_count()
             result["throughput"] = round(self.get_tracer().get_throughput(total=True) / 1000, 3)
             result["energy_cosumption_r"] = round(self.get_tracer().get_energy_consumption_ratio(), 3)
+            result["energy_per_bit_uj"] = round(self.get_tracer().get_energy_per_bit() * 1000 * 1000, 3)
+            result["avg_queue_length"] = round(self.get_tracer().get_average_queue_length(), 3)
+            result["queue_drop"] = self.get_tracer().get_queue_drop_count()
+            result["retries"] = self.get_tracer().get_retry_count()
+            for i in range(BanTxQueue.NUM_PRIORITIES):
+                result[f"latency_up{i}_ms"] = round(self.get_tracer().get_average_queue_latency(i) * 1000, 3)
 
             # output = (
             #     f"NODE: {self.get_mac_params().node_id}\t"
@@ -9,6 +9,16 @@ class BanFrameType(Enum):
     IEEE_802_15_6_MAC_DATA = 2
 
 
+class BanMacState(Enum):
+    MAC_IDLE = 0
+    MAC_CSMA = 1
+    MAC_SENDING = 2
+    MAC_ACK_PENDING = 3
+    CHANNEL_ACCESS_FAILURE = 4
+    CHANNEL_IDLE = 5
+    SET_PHY_TX_ON = 6
+
+
 class BanRecipientType(Enum):
     IEEE_802_15_6_BROADCAST = 999
 
@@ -25,27 +35,78 @@ class BanFrameSubType(Enum):
     WBAN_DATA_UP6 = 8
     WBAN_DATA_UP7 = 9
     UNDEFINED = 10
+    WBAN_CONTROL_BACK = 11
+
+
+# int codes of the frame types and subtypes, compared on the hot path instead of Enum members
+FRAME_TYPE_MANAGEMENT = BanFrameType.IEEE_802_15_6_MAC_MANAGEMENT.value
+FRAME_TYPE_CONTROL = BanFrameType.IEEE_802_15_6_MAC_CONTROL.value
+FRAME_TYPE_DATA = BanFrameType.IEEE_802_15_6_MAC_DATA.value
+
+FRAME_SUBTYPE_BEACON = BanFrameSubType.WBAN_MANAGEMENT_BEACON.value
+FRAME_SUBTYPE_IACK = BanFrameSubType.WBAN_CONTROL_IACK.value
+FRAME_SUBTYPE_BACK = BanFrameSubType.WBAN_CONTROL_BACK.value
+FRAME_SUBTYPE_DATA_UP0 = BanFrameSubType.WBAN_DATA_UP0.value
 
 
-@dataclass
+@dataclass(slots=True)
 class FrameControl:
-    version = None
-    ack_policy = None
-    sec_level = None
-    tk_index = None
-    relay = None
-    ack_timing = None
-    frame_subtype = None
-    frame_type: BanFrameType = None
-    more_data = None
-    last_frame = None
-    sequence_number = None
-    frag_number = None
-    non_final_frag = None
-    reserved = None
-
-
-@dataclass
+    version: int | None = None
+    ack_policy: object = None
+    sec_level: int | None = None
+    tk_index: int | None = None
+    relay: bool | None = None
+    ack_timing: int | None = None
+    frame_subtype: BanFrameSubType | None = None
+    frame_type: BanFrameType | None = None
+    frame_type_code: int | None = None         # frame_type.value
+    frame_subtype_code: int | None = None      # frame_subtype.value
+    more_data: bool | None = None
+    last_frame: bool | None = None
+    sequence_number: int | None = None
+    frag_number: int | None = None
+    non_final_frag: bool | None = None
+    reserved: int | None = None
+
+    # explicit assignments: reset and copy_from run for every pooled packet, a setattr loop costs several times more
+    def reset(self):
+        self.version = None
+        self.ack_policy = None
+        self.sec_level = None
+        self.tk_index = None
+        self.relay = None
+        self.ack_timing = None
+        self.frame_subtype = None
+        self.frame_type = None
+        self.frame_type_code = None
+        self.frame_subtype_code = None
+        self.more_data = None
+        self.last_frame = None
+        self.sequence_number = None
+        self.frag_number = None
+        self.non_final_frag = None
+        self.reserved = None
+
+    def copy_from(self, other: "FrameControl"):
+        self.version = other.version
+        self.ack_policy = other.ack_policy
+        self.sec_level = other.sec_level
+        self.tk_index = other.tk_index
+        self.relay = other.relay
+        self.ack_timing = other.ack_timing
+        self.frame_subtype = other.frame_subtype
+        self.frame_type = other.frame_type
+        self.frame_type_code = other.frame_type_code
+        self.frame_subtype_code = other.frame_subtype_code
+        self.more_data = other.more_data
+        self.last_frame = other.last_frame
+        self.sequence_number = other.sequence_number
+        self.frag_number = other.frag_number
+        self.non_final_frag = other.non_final_frag
+        self.reserved = other.reserved
+
+
+@dataclass(slots=True)
 class AssignedLinkElement:
     allocation_id: int | None = None
     interval_start: int | None = None
@@ -56,6 +117,8 @@ class AssignedLinkElement:
 
 
 class BanMacHeader:
+    __slots__ = ("__frame_control", "ban_id", "sender_id", "recipient_id", "time_slot_index")
+
     def __init__(self):
         self.__frame_control = FrameControl()
         self.ban_id: int = None
@@ -64,10 +127,13 @@ class BanMacHeader:
         self.time_slot_index: int = None
 
     def set_frame_control(self, frame_type: BanFrameType, frame_subtype: BanFrameSubType, ack_policy, sequence_number):
-        self.get_frame_control().frame_type = frame_type
-        self.get_frame_control().frame_subtype = frame_subtype
-        self.get_frame_control().ack_policy = ack_policy
-        self.get_frame_control().sequence_number = sequence_number
+        frame_control = self.get_frame_control()
+        frame_control.frame_type = frame_type
+        frame_control.frame_subtype = frame_subtype
+        frame_control.frame_type_code = frame_type.value
+        frame_control.frame_subtype_code = frame_subtype.value
+        frame_control.ack_policy = ack_policy
+        frame_control.sequence_number = sequence_number
 
     def get_frame_control(self) -> FrameControl:
         if self.__frame_control is None:
@@ -86,26 +152,74 @@ class BanMacHeader:
     def get_tx_params(self) -> Tuple[int, int, int]:
         return self.ban_id, self.sender_id, self.recipient_id
 
+    def reset(self):
+        # the frame control is recycled together with its header
+        self.__frame_control.reset()
+        self.ban_id = None
+        self.sender_id = None
+        self.recipient_id = None
+        self.time_slot_index = None
+
+    def copy_from(self, other: "BanMacHeader"):
+        self.__frame_control.copy_from(other.__frame_control)
+        self.ban_id = other.ban_id
+        self.sender_id = other.sender_id
+        self.recipient_id = other.recipient_id
+        self.time_slot_index = other.time_slot_index
+
 
 class Beacon:
     def __init__(self):
-        self.__assigned_slot_info = list()  # element type is '@dataclass AssignedLinkElement'
+        # node id -> '@dataclass AssignedLinkElement' of every slot allocated to the node, in slot order
+        self.__assigned_slot_info: dict[int, list[AssignedLinkElement]] = dict()
+        self.beacon_interval: float | None = None  # seconds until the next beacon
+        self.rap_start: float | None = None  # random access phase, seconds from the beacon (None: no RAP)
+        self.rap_end: float | None = None
 
     def set_assigned_link_info(self, assigned_link: AssignedLinkElement):
-        self.__assigned_slot_info.append(assigned_link)
+        self.__assigned_slot_info.setdefault(assigned_link.allocation_id, []).append(assigned_link)
+
+    def has_rap(self) -> bool:
+        return self.rap_start is not None and self.rap_end is not None and self.rap_end > self.rap_start
 
-    def get_assigned_link_info(self, node_id):
-        for s_info in self.__assigned_slot_info:
-            if s_info.allocation_id == node_id:
-                return s_info
-        return None
+    def get_assigned_link_info(self, node_id) -> AssignedLinkElement | None:
+        # the first slot allocated to the node
+        assigned_links = self.__assigned_slot_info.get(node_id)
+        return assigned_links[0] if assigned_links else None
+
+    def get_assigned_links(self, node_id) -> list[AssignedLinkElement]:
+        return self.__assigned_slot_info.get(node_id, [])
 
 
 class IAck:
+    """stateless, shared by all IAck frames (see IACK_BODY)"""
     def __init__(self):
         pass
 
 
+class BlockAck:
+    """B-ACK frame body: the frame with sequence number start_seq + i is acknowledged if bit i of the bitmap is set"""
+    def __init__(self):
+        self.start_seq: int | None = None
+        self.bitmap: int = 0
+
+    def is_acknowledged(self, sequence_number: int) -> bool:
+        offset = sequence_number - self.start_seq
+        return offset >= 0 and (self.bitmap >> offset) & 1 == 1
+
+
 class Data:
+    """stateless except for the user priority, one shared instance per priority (see DATA_BODIES)"""
     def __init__(self, priority):
         self.priority = priority
+
+
+class AggregateData(Data):
+    """frame body of an aggregate data frame, carries the queued frames sent under a single MAC header"""
+    def __init__(self, priority, packets: list):
+        super().__init__(priority)
+        self.packets = packets
+
+
+IACK_BODY = IAck()
+DATA_BODIES = tuple(Data(priority) for priority in range(8))
@@ -0,0 +1,161 @@
+from collections import deque
+from enum import Enum
+from typing import Callable
+
+from ban.base.packet import Packet
+from ban.base.tracer import Tracer
+
+
+class BanQueueDropPolicy(Enum):
+    TAIL_DROP = 0   # reject the arriving packet when the queue is full
+    HEAD_DROP = 1   # drop the oldest packet to make room for the arriving one
+    EXPIRE = 2      # drop packets older than max_age, then tail-drop if still full
+
+
+class BanTxQueue:
+    """
+    Lock-free MAC TX queue with one bounded FIFO per user priority (UP0-UP7).
+
+    The simulator is single-threaded, so deques replace queue.Queue. A bitmask of non-empty priorities gives the
+    highest pending priority in O(1) for strict-priority dequeue. Occupancy changes, drops and queueing latency are
+    reported to the tracer.
+
+    A queued packet dropped by the HEAD_DROP or EXPIRE policy goes to the drop handler (the MAC confirms it to the
+    SSCS and releases it), an arriving packet rejected by put_nowait stays with the caller.
+    """
+    NUM_PRIORITIES = 8
+
+    def __init__(
+            self,
+            capacity: int | None = None,
+            drop_policy: BanQueueDropPolicy = BanQueueDropPolicy.TAIL_DROP,
+            max_age: float | None = None,
+    ):
+        self.env = None
+        self.tracer: Tracer | None = None
+        self.drop_handler: Callable[[Packet, bool], None] | None = None  # (dropped packet, expired)
+        self.capacity: int | None = capacity      # per priority, None: unbounded
+        self.drop_policy: BanQueueDropPolicy = drop_policy
+        self.max_age: float | None = max_age      # seconds, used by BanQueueDropPolicy.EXPIRE
+
+        # queues[priority]: (packet, enqueue time)
+        self.__queues: tuple[deque[tuple[Packet, float]], ...] = tuple(deque() for _ in range(BanTxQueue.NUM_PRIORITIES))
+        self.__mask = 0     # bit p is set if queues[p] is not empty
+        self.__length = 0
+
+    def set_env(self, env):
+        self.env = env
+
+    def set_tracer(self, tracer: Tracer):
+        self.tracer = tracer
+
+    def set_drop_handler(self, drop_handler: Callable[[Packet, bool], None]):
+        self.drop_handler = drop_handler
+
+    def __len__(self):
+        return self.__length
+
+    def get_length(self, priority: int) -> int:
+        return len(self.__queues[priority])
+
+    def __update_occupancy(self, delta: int):
+        self.__length += delta
+        if self.tracer is not None:
+            self.tracer.update_queue_length(self.__length)
+
+    def __drop(self, packet: Packet | None = None, expired: bool = False):
+        if self.tracer is not None:
+            self.tracer.add_queue_drop(expired)
+
+        if packet is None:
+            return
+
+        if self.drop_handler is not None:
+            self.drop_handler(packet, expired)
+        else:
+            packet.release()
+
+    def expire(self, priority: int) -> int:
+        """
+        drop packets that waited longer than max_age from the head of a priority queue
+        :param priority: user priority
+        :return: the number of expired packets
+        """
+        if self.drop_policy != BanQueueDropPolicy.EXPIRE or self.max_age is None:
+            return 0
+
+        queue = self.__queues[priority]
+        deadline = self.env.now - self.max_age
+        expired = 0
+        while queue and queue[0][1] < deadline:
+            self.__drop(queue.popleft()[0], expired=True)
+            expired += 1
+
+        if expired > 0:
+            if not queue:
+                self.__mask &= ~(1 << priority)
+            self.__update_occupancy(-expired)
+
+        return expired
+
+    def put_nowait(self, packet: Packet, priority: int = 0) -> bool:
+        """
+        :param packet: Packet
+        :param priority: user priority, 0 (lowest) ~ 7 (highest)
+        :return: False if the arriving packet was dropped
+        """
+        queue = self.__queues[priority]
+
+        if self.capacity is not None and len(queue) >= self.capacity:
+            self.expire(priority)
+
+            if len(queue) >= self.capacity:
+                if self.drop_policy == BanQueueDropPolicy.HEAD_DROP:
+                    self.__drop(queue.popleft()[0])
+                    self.__update_occupancy(-1)
+                else:
+                    self.__drop()
+                    return False
+
+        queue.append((packet, self.env.now))
+        self.__mask |= (1 << priority)
+        self.__update_occupancy(1)
+        return True
+
+    def get_nowait(self) -> Packet | None:
+        while self.__mask:
+            priority = self.__mask.bit_length() - 1     # highest non-empty priority
+            self.expire(priority)
+
+            queue = self.__queues[priority]
+            if not queue:
+                continue
+
+            packet, enqueue_time = queue.popleft()
+            if not queue:
+                self.__mask &= ~(1 << priority)
+            self.__update_occupancy(-1)
+
+            if self.tracer is not None:
+                self.tracer.add_queue_latency(priority, self.env.now - enqueue_time)
+
+            return packet
+
+        return None
+
+    def peek(self) -> Packet | None:
+        # the packet get_nowait() would return, without removing it
+        if self.empty():
+            return None
+
+        return self.__queues[self.__mask.bit_length() - 1][0][0]
+
+    def empty(self) -> bool:
+        while self.__mask:
+            priority = self.__mask.bit_length() - 1
+            self.expire(priority)
+
+            if self.__queues[priority]:
+                return False
+
+        return True
@@ -5,9 +5,7 @@ import simpy
 from ban.base.channel.channel import Channel
 from ban.base.channel.csma_ca import CsmaCa
 from ban.base.packet import Packet
-from ban.config.JSONConfig import JSONConfig
 from ban.device.mac import BanMac
-from ban.device.mac_header import BanMacHeader
 from ban.device.phy import BanPhy
 from ban.device.sscs import BanTxParams, BanSSCS
 
@@ -38,22 +36,6 @@ class Node:
             raise Exception("you must set PHY device first.")
         return self.m_phy.get_channel()
 
-    def generate_data(self, event):
-        packet_size = int(JSONConfig.get_config("packet_size"))
-        self.m_tx_pkt = Packet(packet_size)
-
-        mac_header = BanMacHeader()
-        mac_header.set_tx_params(self.m_tx_params.ban_id, self.m_tx_params.node_id, self.m_tx_params.recipient_id)
-        self.m_tx_pkt.set_mac_header_(mac_header=mac_header)
-
-        self.m_sscs.send_data(self.m_tx_pkt)
-
-        ev = self.env.event()
-        ev._ok = True
-        ev.callbacks.append(self.generate_data)
-        ev.callbacks.append(lambda _: self.get_mac().show_result(ev))
-        self.env.schedule(ev, priority=0, delay=0.1)
-
 
 class NodeBuilder:
     def __init__(self):
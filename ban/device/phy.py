@@ -1,17 +1,21 @@
 import logging
 import math
+from collections import Counter
 from dataclasses import dataclass, fields
 from enum import Enum
 from typing import Tuple
 
 import simpy
 
-from ban.base.channel.base_channel import AntennaModel, SpectrumSignalParameters
+from ban.base.channel.base_channel import AntennaModel, SpectrumSignalParameters, ErrorModel
+from ban.base.channel.error_model import BanErrorModel, BanModulation
 from ban.base.logging.log import SeoungSimLogger
 from ban.base.mobility import MobilityModel
 from ban.base.packet import Packet
+from ban.base.pool import ObjectPool
 from ban.base.utils import seconds
 from ban.base.channel.channel import Channel
+from ban.config.JSONConfig import JSONConfig
 
 
 class BanPhyTRxState(Enum):
@@ -63,6 +67,21 @@ class BanPhyPibAttributes:
     phy_shr_duration = None
     phy_symbols_per_octet = None
 
+    def reset(self):
+        self.phy_current_channel = None
+        self.phy_channels_supported = None
+        self.phy_tx_power = None
+        self.phy_cca_mode = None
+        self.phy_current_page = None
+        self.phy_max_frame_duration = None
+        self.phy_shr_duration = None
+        self.phy_symbols_per_octet = None
+
+
+pib_attributes_pool: ObjectPool[BanPhyPibAttributes] = ObjectPool(
+    "BanPhyPibAttributes", factory=BanPhyPibAttributes, reset=BanPhyPibAttributes.reset
+)
+
 
 @dataclass
 class BanPhyDataAndSymbolRates:
@@ -76,12 +95,71 @@ class BanPhyPpduHeaderSymbolNumber:         # PPDU: Physical layer Protocol Data
     shr_sfd: float | None = None            # PSDU: T_PSDU
     phr: float | None = None                # Synchronization header: T_SHR
 
+
+@dataclass(frozen=True)
+class BanPhyTRxTransition:
+    next_state: BanPhyTRxState | None   # None: keep the current state
+    confirm: BanPhyTRxState             # state reported by set_trx_state_confirm()
+
+
 NOISE = -10
+# dBm, noise floor seen by the error model, overridden by "noise_floor": at -88 dBm a frame at the sensitivity
+# (-82 dBm) has about 6 dB SINR, so the PER curve, not only the sensitivity cutoff, decides losses near sensitivity
+NOISE_FLOOR = -88
 
 class BanPhy:
     # the turnaround time for switching the transceiver from RX to TX or vice versa
     aTurnaroundTime = 12
 
+    # (current state, requested state) -> transition, every request emits exactly one confirm
+    trx_state_transitions: dict[tuple[BanPhyTRxState, BanPhyTRxState], BanPhyTRxTransition] = {
+        # requesting the current state only reports it
+        **{(state, state): BanPhyTRxTransition(None, state) for state in BanPhyTRxState},
+
+        # stop an ongoing transmission
+        (BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_TX, BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON):
+            BanPhyTRxTransition(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON, BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON),
+        (BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_TX, BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF):
+            BanPhyTRxTransition(BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF, BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF),
+
+        # turn off the transceiver
+        (BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_RX, BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF):
+            BanPhyTRxTransition(BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF, BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF),
+        (BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON, BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF):
+            BanPhyTRxTransition(BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF, BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF),
+        (BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON, BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF):
+            BanPhyTRxTransition(BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF, BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF),
+
+        # turn on PHY_TX_ON, an incomplete reception is discarded
+        (BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_RX, BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON):
+            BanPhyTRxTransition(BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON, BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON),
+        (BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON, BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON):
+            BanPhyTRxTransition(BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON, BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON),
+        (BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF, BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON):
+            BanPhyTRxTransition(BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON, BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON),
+        # We only report that the transceiver is already in TX mode
+        (BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_TX, BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON):
+            BanPhyTRxTransition(None, BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON),
+
+        # turn on PHY_RX_ON
+        (BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON, BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON):
+            BanPhyTRxTransition(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON, BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON),
+        (BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF, BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON):
+            BanPhyTRxTransition(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON, BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON),
+        # the receiver is already on and busy
+        (BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_RX, BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON):
+            BanPhyTRxTransition(None, BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON),
+    }
+
+    # power draw of the transceiver in each state (watt), CC2420-class radio at 3 V and 0 dBm TX power
+    trx_state_power: dict[BanPhyTRxState, float] = {
+        BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF: 0.00006,
+        BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON: 0.0564,
+        BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_RX: 0.0564,
+        BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON: 0.0522,
+        BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_TX: 0.0522,
+    }
+
     logger = SeoungSimLogger(logger_name="BAN-PHY", level=logging.DEBUG)
 
     def __init__(self):
@@ -94,11 +172,12 @@ class BanPhy:
         self.__mac = None
         self.__mobility = None
         self.__antenna = None
-        self.__cca_peak_power = 0.0
+        self.__cca_peak_power = -math.inf  # dBm
 
         self.__pib_attributes = BanPhyPibAttributes()
         self.__rx_pkt = None
         self.__phy_option = BanPhyOption.IEEE_802_15_6_INVALID_PHY_OPTION
+        self.__tx_time_cache: dict[int, float] = dict()    # frame size (bytes) -> TX time (s) for the PHY option
 
         self.__data_symbol_rates: Tuple[BanPhyDataAndSymbolRates, ...] = tuple(
             BanPhyDataAndSymbolRates(i, j)
@@ -126,7 +205,18 @@ class BanPhy:
             )
         )
 
+        self.__modulations: Tuple[BanModulation, ...] = (
+            BanModulation.BPSK,
+            BanModulation.BPSK,
+            BanModulation.ASK,
+            BanModulation.ASK,
+            BanModulation.OQPSK,
+            BanModulation.OQPSK,
+            BanModulation.OQPSK
+        )
+
         self.__trx_state = BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF
+        self.__trx_transition_count: Counter = Counter()
 
 
     def set_env(self, env: simpy.Environment):
@@ -164,9 +254,25 @@ class BanPhy:
     def get_rx_antenna(self):
         return self.__antenna
 
+    def set_error_model(self, error_model: ErrorModel):
+        self.__error_model = error_model
+
+    def get_error_model(self) -> ErrorModel:
+        return self.__error_model
+
     def do_initialize(self):
         self.__phy_option = BanPhyOption.IEEE_802_15_6_915MHZ_OQPSK
+        self.__tx_time_cache.clear()
         self.__rx_sensitivity = -82  # dBm
+        noise_floor = JSONConfig.get_config("noise_floor")
+        self.__noise_floor = NOISE_FLOOR if noise_floor is None else float(noise_floor)  # dBm
+
+        if self.__error_model is None:
+            # every PHY draws from its own stream, so the reception results do not depend on the node order
+            seed = JSONConfig.get_config("error_model_seed")
+            seed = (42 if seed is None else int(seed)) + self.__mac.get_mac_params().node_id
+
+            self.__error_model = BanErrorModel(self.__modulations[self.__phy_option.value], seed=seed)
 
     def set_attribute_request(self, attribute_id: BanPibAttributeIdentifier, attribute: BanPhyPibAttributes):
         status = BanPhyTRxState.IEEE_802_15_6_PHY_SUCCESS
@@ -215,88 +321,63 @@ class BanPhy:
 
     def set_trx_state_request(self, new_state: BanPhyTRxState):
         # Trying to set __trx_state to new_state
-        if self.__trx_state == new_state:
-            self.__mac.set_trx_state_confirm(new_state)
+        key = (self.__trx_state, new_state)
+        transition = BanPhy.trx_state_transitions.get(key)
+
+        # the request is not supported in the current state: ignore it
+        if transition is None:
             return
 
-        if ((new_state == BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON or
-             new_state == BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF) and
-                self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_TX):
-            # return  # Send set_trx_state_confirm() later
-            self.change_trx_state(new_state)
-            self.__mac.set_trx_state_confirm(new_state)
+        self.__trx_transition_count[key] += 1
 
-        if new_state == BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF:
+        if transition.next_state is not None:
+            self.change_trx_state(transition.next_state)
 
-            if self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_RX:
-                # return  # Send set_trx_state_confirm() later
-                self.change_trx_state(new_state)
-                self.__mac.set_trx_state_confirm(new_state)
-            elif (self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON or
-                  self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON):
-                self.change_trx_state(BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF)
-                self.__mac.set_trx_state_confirm(new_state)
-                return
-
-        # turn on PHY_TX_ON
-        if new_state == BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON:
-            # terminate reception if needed
-            # incomplete reception -- force packet discard
-            if (self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_RX or
-                    self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON):
-                self.change_trx_state(BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON)
-                self.__mac.set_trx_state_confirm(BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON)
-                return
-            # We do not change the transceiver state here.
-            # We only report that the transceiver is already in Tx_On state
-            elif (self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_TX or
-                  self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON):
-                self.__mac.set_trx_state_confirm(BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON)
-                return
-            # Simply set the transceiver to Tx mode
-            elif self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF:
-                self.change_trx_state(BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON)
-                self.__mac.set_trx_state_confirm(BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON)
-                return
-
-        if new_state == BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON:
-            if (self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON or
-                    self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF):
-                self.change_trx_state(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON)
-                self.__mac.set_trx_state_confirm(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON)
-                return
-            # Simply set the transceiver to Rx mode
-            if self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_RX:
-                self.__mac.set_trx_state_confirm(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON)
-                return
+        self.__mac.set_trx_state_confirm(transition.confirm)
+
+    def get_trx_state(self) -> BanPhyTRxState:
+        return self.__trx_state
+
+    def is_trx_off(self) -> bool:
+        return self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF
+
+    def get_trx_transition_count(self) -> Counter:
+        """
+        returns how many times each (current state, requested state) transition was taken
+        :return: Counter keyed by (current_state, requested_state)
+        """
+        return self.__trx_transition_count
 
     def change_trx_state(self, new_state: BanPhyTRxState):
         self.__trx_state = new_state
 
+        # energy is charged per state duration, only when the state changes
+        self.__mac.get_tracer().change_trx_state(new_state, BanPhy.trx_state_power[new_state])
+
     def pd_data_request(self, tx_packet: Packet):
         if self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON:
             self.change_trx_state(BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_TX)
 
-            spec_tx_params = SpectrumSignalParameters()
+            # fill the spectrum parameters the packet already owns
+            spec_tx_params = tx_packet.get_spectrum_tx_params()
             tx_duration = self.calc_tx_time(tx_packet)
             spec_tx_params.duration = tx_duration
             spec_tx_params.tx_phy = self
             spec_tx_params.tx_power = self.__pib_attributes.phy_tx_power
             spec_tx_params.tx_antenna = self.__antenna
 
-            # Add the spectrum Tx parameters to the Tx_pkt
-            tx_packet.set_spectrum_tx_params(spec_tx_params)
-
             # We have to previously forward the required parameter before we register the event of a function call
             self.get_channel().set_tx_packet(tx_packet)
 
             # update trace info
-            self.get_mac().get_tracer().add_tx_packet(tx_packet)
+            self.get_mac().get_tracer().add_tx_packet(tx_packet, retransmission=self.get_mac().is_retransmission())
+
 
+            # the receivers start receiving with the transmission and end with it
+            self.get_channel().start_tx(tx_packet)
 
             event = self.__env.event()
             event._ok = True
-            event.callbacks.append(self.get_channel().start_tx)
             event.callbacks.append(self.end_tx)
             self.__env.schedule(event, priority=0, delay=tx_duration)
 
@@ -327,17 +408,22 @@ class BanPhy:
 
         # if the transmission fails
 
-    def start_rx(self, event):
+    def start_rx(self, rx_packet: Packet):
+        self.__rx_pkt = rx_packet
         drop_reason = ""
         if self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON:
             # If the 10*log10 (sinr) > -5, then receive the packet, otherwise drop the packet
             self.change_trx_state(BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_RX)
 
-            if self.__rx_pkt.get_spectrum_tx_params().tx_power + self.__noise >= self.__rx_sensitivity:
-                self.__rx_pkt.success = True
-            else:
+            rx_power = self.__rx_pkt.get_spectrum_tx_params().tx_power + self.__noise
+
+            # below the sensitivity the frame is not detected, otherwise the error model decides at the end of
+            # the reception, when every overlapping transmission is known
+            if rx_power < self.__rx_sensitivity:
                 drop_reason = "low TX power"
                 self.__rx_pkt.success = False
+            else:
+                self.__rx_pkt.success = True
             # print('Rx power (dBm):', self.__rx_pkt.get_spectrum_tx_params().tx_power + self.__noise)
         elif self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_RX:
             drop_reason = "current PHY state is BUSY_TX"
@@ -362,13 +448,46 @@ class BanPhy:
 
         event = self.__env.event()
         event._ok = True
-        event.callbacks.append(self.end_rx)
+        event.callbacks.append(
+            lambda _, rx_packet=self.__rx_pkt, rx_start=self.__env.now: self.end_rx(rx_packet, rx_start)
+        )
         self.__env.schedule(event, priority=0, delay=rx_duration)
 
-    def end_rx(self, event):
-        # If the packet was successfully received, push it up the stack
-        if self.__rx_pkt.success is True:
-            self.__mac.pd_data_indication(self.__rx_pkt)
+    def calc_sinr(self, rx_packet: Packet, rx_start: float) -> float:
+        """
+        SINR of a reception over the noise floor and the other transmissions sensed during it
+        :param rx_packet: received frame, its spectrum parameters hold the power at this receiver
+        :param rx_start: time the reception started
+        :return: dB
+        """
+        spec_rx_params = rx_packet.get_spectrum_tx_params()
+        interference = self.get_channel().get_interference_power(
+            receiver=self, sender=spec_rx_params.tx_phy, start=rx_start, end=self.__env.now
+        )
+        # interferers are attenuated like the frame itself (self.__noise)
+        noise_and_interference = (
+            math.pow(10.0, self.__noise_floor / 10.0) + interference * math.pow(10.0, self.__noise / 10.0)
+        )
+
+        return spec_rx_params.tx_power + self.__noise - 10.0 * math.log10(noise_and_interference)
+
+    def end_rx(self, rx_packet: Packet, rx_start: float | None = None):
+        if rx_packet.success is True and rx_start is not None:
+            sinr = self.calc_sinr(rx_packet, rx_start)
+
+            if not self.__error_model.is_received(sinr, rx_packet.get_size()):
+                rx_packet.success = False
+                BanPhy.logger.log(
+                    sim_time=self.get_env().now,
+                    msg=f"RX packet dropped due to: packet error, SINR {sinr:.2f} dB",
+                    level=logging.WARN
+                )
+
+        # If the packet was successfully received, push it up the stack, the MAC releases it when it is done
+        if rx_packet.success is True:
+            self.__mac.pd_data_indication(rx_packet)
+        else:
+            rx_packet.release()
 
         if self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_RX:
             self.change_trx_state(BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON)
@@ -379,14 +498,40 @@ class BanPhy:
         :param tx_packet: Packet
         :return:
         """
+        return self.calc_tx_time_by_size(tx_packet.get_size())
+
+    def calc_tx_time_by_size(self, packet_size: int) -> float:
+        """
+        calculate total TX time(including PPDU header) of a frame with the given size
+        :param packet_size: bytes
+        :return:
+        """
+        tx_time = self.__tx_time_cache.get(packet_size)
+        if tx_time is not None:
+            return tx_time
+
         is_data = True
         tx_time = self.get_ppdu_header_tx_time()
 
         # multiply 8.0 for convert bits to bytes
-        tx_time += (tx_packet.get_size() * 8.0 / self.get_data_or_symbol_rate(is_data))  # seconds
+        tx_time += (packet_size * 8.0 / self.get_data_or_symbol_rate(is_data))  # seconds
 
+        self.__tx_time_cache[packet_size] = tx_time
         return tx_time
 
+    def calc_max_size_by_tx_time(self, tx_time: float) -> int:
+        """
+        calculate the largest frame size that is sent in less than tx_time
+        :param tx_time: seconds
+        :return: bytes, 0 if not even the PPDU header fits
+        """
+        payload_time = tx_time - self.get_ppdu_header_tx_time()
+        if payload_time <= 0:
+            return 0
+
+        size = math.ceil(payload_time * self.get_data_or_symbol_rate(is_data=True) / 8.0) - 1
+        return max(size, 0)
+
     def get_ppdu_header_tx_time(self) -> float | None:
         """
         calculate total PPDU header TX time
@@ -420,11 +565,15 @@ class BanPhy:
             print('fatal error: Invalid phy option')
             return None
 
+    def get_cca_time(self) -> float:
+        # a CCA lasts 8 symbols
+        return seconds(8.0 / self.get_data_or_symbol_rate(False))
+
     def plme_cca_request(self):
         if (self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON or
                 self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_RX):
-            self.__cca_peak_power = 0.0
-            cca_time = seconds(8.0 / self.get_data_or_symbol_rate(False))
+            self.__cca_peak_power = -math.inf
+            cca_time = self.get_cca_time()
 
             event = self.__env.event()
             event._ok = True
@@ -436,6 +585,16 @@ class BanPhy:
             else:
                 self.__mac.plme_cca_confirm(BanPhyTRxState.IEEE_802_15_6_PHY_BUSY)
 
+    def senses(self, rx_power: float) -> bool:
+        """
+        whether a CCA of this PHY detects a frame received with rx_power (dBm, before self.__noise),
+        the same test end_cca applies to the peak power
+        """
+        if self.__pib_attributes.phy_cca_mode == 2:
+            return True
+
+        return rx_power + self.__noise - self.__rx_sensitivity >= 10.0
+
     def end_cca(self, event):
         sensed_channel_state = BanPhyTRxState.IEEE_802_15_6_PHY_UNSPECIFIED
 
@@ -443,19 +602,18 @@ class BanPhy:
         if self.phy_is_busy() is True:
             sensed_channel_state = BanPhyTRxState.IEEE_802_15_6_PHY_BUSY
         elif self.__pib_attributes.phy_cca_mode == 1:
-            if 10 * math.log10(self.__cca_peak_power / self.__rx_sensitivity) >= 10.0:
+            # energy detection: both powers are in dBm
+            if self.__cca_peak_power - self.__rx_sensitivity >= 10.0:
                 sensed_channel_state = BanPhyTRxState.IEEE_802_15_6_PHY_BUSY
-                print('CCA result =', sensed_channel_state)
             else:
                 sensed_channel_state = BanPhyTRxState.IEEE_802_15_6_PHY_IDLE
-                print('CCA result =', sensed_channel_state)
         elif self.__pib_attributes.phy_cca_mode == 2:
             if self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_RX:
                 sensed_channel_state = BanPhyTRxState.IEEE_802_15_6_PHY_BUSY
             else:
                 sensed_channel_state = BanPhyTRxState.IEEE_802_15_6_PHY_IDLE
         elif self.__pib_attributes.phy_cca_mode == 3:
-            if (10 * math.log10(self.__cca_peak_power / self.__rx_sensitivity) >= 10.0 and
+            if (self.__cca_peak_power - self.__rx_sensitivity >= 10.0 and
                     self.__trx_state == BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_RX):
                 sensed_channel_state = BanPhyTRxState.IEEE_802_15_6_PHY_BUSY
             else:
@@ -9,9 +9,11 @@ from simpy.events import NORMAL
 from ban.base.helper.mobility_helper import MobilityHelper, MovementInfo
 from ban.base.logging.log import SeoungSimLogger
 from ban.base.packet import Packet
+from ban.base.pool import ObjectPool, reset_dataclass
+from ban.base.sink import RxSink, CountingSink, create_rx_sink
 from ban.base.utils import milliseconds, microseconds
 from ban.config.JSONConfig import JSONConfig
-from ban.device.mac_header import BanFrameType, BanFrameSubType, AssignedLinkElement
+from ban.device.mac_header import BanFrameType, BanFrameSubType, AssignedLinkElement, Beacon
 
 from ban.base.q_learning.q_learning_trainer import QLearningTrainer
 
@@ -23,6 +25,7 @@ class BanTxOption(Enum):
     TX_OPTION_ACK = 1
     TX_OPTION_GTS = 2
     TX_OPTION_INDIRECT = 3
+    TX_OPTION_BACK = 4      # acknowledged by a block ACK at the end of the burst
 
 
 class BanDataConfirmStatus(Enum):
@@ -47,7 +50,7 @@ class TimeSlotInfo:
     end_time: float
 
 
-@dataclass
+@dataclass(slots=True)
 class BanTxParams:
     ban_id: int | None = None
     node_id: int | None = None
@@ -56,10 +59,14 @@ class BanTxParams:
     tx_option: BanTxOption | None = None
     time_slot_info: int | None = None
 
-@dataclass
+
+tx_params_pool: ObjectPool[BanTxParams] = ObjectPool("BanTxParams", factory=BanTxParams, reset=reset_dataclass)
+
+
+@dataclass(slots=True)
 class TimeSlotAllocationInfo:
-    time_slot_index: int | None = None,
-    node_id:int | None = None,
+    time_slot_index: int | None = None
+    node_id: int | None = None
     mobility_phase: MovementInfo | None = None
 
 
@@ -69,6 +76,7 @@ class BanSSCS:
 
     NUM_SLOTS = int(JSONConfig.get_config("time_slots"))
     SLOT_DURATION = 1
+    BEACON_TEMPLATE_CACHE_SIZE = 256    # cached (phase, schedule) beacons, the cache starts over when it is full
 
     def __init__(
             self,
@@ -80,11 +88,22 @@ class BanSSCS:
             q_learning_trainer: QLearningTrainer | None = None,
     ):
         self.env: simpy.Environment | None = None
-        self.packet_list: list = list()
+        # received data frames go to the sink, only the coordinator gets the configured one
+        self.rx_sink: RxSink = create_rx_sink() if coordinator else CountingSink()
         self.mac: None = None   # To interact with a MAC layer
         self.node_list: list = list()
         self.tx_params: BanTxParams = BanTxParams()
-        self.tx_power: float = 0   # dBm
+        tx_power = JSONConfig.get_config("tx_power")
+        self.tx_power: float = 0 if tx_power is None else float(tx_power)   # dBm, assigned to every link
+
+        # frame sizes (bytes): data payload per user priority (UP0-UP7) and beacon, "packet_size" if not configured
+        packet_size = int(JSONConfig.get_config("packet_size"))
+        payload_sizes = JSONConfig.get_config("payload_sizes")
+        beacon_frame_size = JSONConfig.get_config("beacon_frame_size")
+        self.payload_sizes: tuple[int, ...] = (
+            (packet_size,) * 8 if payload_sizes is None else tuple(int(size) for size in payload_sizes)
+        )
+        self.beacon_frame_size: int = packet_size if beacon_frame_size is None else int(beacon_frame_size)
 
         if coordinator:
             if q_learning_trainer is not None:
@@ -122,6 +141,9 @@ class BanSSCS:
 
             self.time_slots: list[TimeSlotAllocationInfo] = []
 
+            # (movement phase, schedule) -> beacon body and slot records, see build_beacon_template
+            self.beacon_templates: dict[tuple, tuple[Beacon, tuple[TimeSlotAllocationInfo, ...]]] = dict()
+
 
     def set_env(self, env):
         self.env = env
@@ -191,7 +213,8 @@ class BanSSCS:
             newline=" "
         )
 
-        self.packet_list.append(rx_packet)
+        # the sink keeps at most a record, the MAC releases the packet when it is done with it
+        self.rx_sink.receive(self.env.now, rx_packet)
 
 
     def send_beacon(self, event):
@@ -204,13 +227,7 @@ class BanSSCS:
             return
 
         # 비콘 패킷 설정
-        tx_packet = Packet(packet_size=int(JSONConfig.get_config("packet_size")))
-        tx_params = BanTxParams()
-        tx_params.tx_option = BanTxOption.TX_OPTION_NONE
-        tx_params.seq_num = None
-        tx_params.ban_id = self.tx_params.ban_id
-        tx_params.node_id = self.tx_params.node_id
-        tx_params.recipient_id = 999  # broadcast id: 999
+        tx_packet = Packet.acquire(packet_size=self.beacon_frame_size)
 
         BanSSCS.logger.log(
             sim_time=self.env.now,
@@ -219,13 +236,6 @@ class BanSSCS:
             newline="\n"
         )
 
-        self.mac.set_mac_header(
-            packet=tx_packet,
-            tx_params=tx_params,
-            frame_type=BanFrameType.IEEE_802_15_6_MAC_MANAGEMENT,
-            frame_subtype=BanFrameSubType.WBAN_MANAGEMENT_BEACON
-        )
-
         # 현재 페이즈의 주기에 맞게 비콘 주기 업데이트
         self.update_beacon_interval()
 
@@ -238,14 +248,6 @@ class BanSSCS:
             level=logging.INFO
         )
 
-        # beacon_length는 ms 단위 -> beacon_interval은 s 단위이므로 1000을 곱함
-        beacon_length = self.beacon_interval * 1000  # ms
-        # TODO: 비콘 interval 기간과 비콘 신호 길이 분리
-
-
-        start_offset = 0
-        num_slot = BanSSCS.NUM_SLOTS  # for test. the number of allocation slots
-
         '''Q-learning: allocate time slot by strategy'''
         # [node, node, ..., node], slots[time_slot_index]: node_id
         slots = self.q_learning_trainer.get_time_slots(self.q_learning_trainer.detect_movement_phase())
@@ -257,6 +259,65 @@ class BanSSCS:
             level=logging.INFO
         )
 
+        # the same phase and schedule give the same beacon body and slot records, they are built once
+        template_key = (self.mobility_helper.current_phase, tuple(slots))
+        beacon_template = self.beacon_templates.get(template_key)
+
+        if beacon_template is None:
+            if len(self.beacon_templates) >= BanSSCS.BEACON_TEMPLATE_CACHE_SIZE:
+                self.beacon_templates.clear()
+
+            beacon_template = self.build_beacon_template(slots)
+            self.beacon_templates[template_key] = beacon_template
+
+        beacon, time_slots = beacon_template
+
+        tx_params = tx_params_pool.acquire()
+        tx_params.tx_option = BanTxOption.TX_OPTION_NONE
+        tx_params.seq_num = None
+        tx_params.ban_id = self.tx_params.ban_id
+        tx_params.node_id = self.tx_params.node_id
+        tx_params.recipient_id = 999  # broadcast id: 999
+
+        self.mac.set_mac_header(
+            packet=tx_packet,
+            tx_params=tx_params,
+            frame_type=BanFrameType.IEEE_802_15_6_MAC_MANAGEMENT,
+            frame_subtype=BanFrameSubType.WBAN_MANAGEMENT_BEACON,
+            frame_body=beacon
+        )
+        tx_params_pool.release(tx_params)
+
+        self.time_slots.extend(time_slots)
+
+        self.beacon_start_time = self.env.now
+
+        self.mac.mlme_data_request(tx_packet)
+
+        event = self.env.event()
+        event._ok = True
+        event.callbacks.append(self.beacon_interval_timeout)  # this method must be called before the send_beacon()
+        event.callbacks.append(self.send_beacon)
+        self.env.schedule(event, priority=NORMAL, delay=self.beacon_interval)
+
+
+    def build_beacon_template(self, slots: list[int]) -> tuple[Beacon, tuple[TimeSlotAllocationInfo, ...]]:
+        """
+        build the beacon body and the slot records of a schedule in the current movement phase
+        :param slots: slots[time_slot_index]: node_id, -1 if the slot is not allocated
+        :return: beacon body (shared by every beacon with the same phase and schedule), slot records
+        """
+        beacon = Beacon()
+        beacon.beacon_interval = self.beacon_interval
+        time_slots = []
+
+        # beacon_length는 ms 단위 -> beacon_interval은 s 단위이므로 1000을 곱함
+        beacon_length = self.beacon_interval * 1000  # ms
+        # TODO: 비콘 interval 기간과 비콘 신호 길이 분리
+
+        start_offset = 0
+        num_slot = BanSSCS.NUM_SLOTS  # for test. the number of allocation slots
+
         for time_slot_index, node_id in enumerate(slots):
             if node_id != -1:
                 assigned_link = AssignedLinkElement()
@@ -266,7 +327,7 @@ class BanSSCS:
                 assigned_link.tx_power = self.tx_power
                 assigned_link.time_slot_index = time_slot_index
 
-                tx_packet.get_frame_body().set_assigned_link_info(assigned_link)
+                beacon.set_assigned_link_info(assigned_link)
 
             BanSSCS.logger.log(
                 sim_time=self.env.now,
@@ -274,7 +335,7 @@ class BanSSCS:
                 level=logging.INFO
             )
 
-            self.time_slots.append(
+            time_slots.append(
                 TimeSlotAllocationInfo(
                     time_slot_index=time_slot_index,
                     node_id=node_id,
@@ -286,15 +347,20 @@ class BanSSCS:
             if start_offset > beacon_length:
                 break
 
-        self.beacon_start_time = self.env.now
+        # 할당되지 않은 노드는 마지막 슬롯 이후부터 다음 비콘 직전까지 RAP에서 경쟁
+        if self.q_learning_trainer.use_unallocated:
+            slot_duration = microseconds(
+                self.mac.pAllocationSlotMin + self.mac.mAllocationSlotLength * self.mac.pAllocationSlotResolution
+            )
+            beacon.rap_start = start_offset * slot_duration
+            # RAP times count from the end of the beacon reception, the next beacon starts one beacon time earlier
+            beacon.rap_end = (
+                    self.beacon_interval
+                    - self.mac.get_phy().calc_tx_time_by_size(self.beacon_frame_size)
+                    - microseconds(self.mac.mBeaconWakeUpGuard)
+            )
 
-        self.mac.mlme_data_request(tx_packet)
-
-        event = self.env.event()
-        event._ok = True
-        event.callbacks.append(self.beacon_interval_timeout)  # this method must be called before the send_beacon()
-        event.callbacks.append(self.send_beacon)
-        self.env.schedule(event, priority=NORMAL, delay=self.beacon_interval)
+        return beacon, tuple(time_slots)
 
 
     # def update_q_table(self): #, time_slot_index: int, node_id: int):
@@ -316,27 +382,32 @@ class BanSSCS:
         self.q_learning_trainer.print_throughput()
         # self.update_q_table()
 
-        while self.time_slots:
-            time_slot: TimeSlotAllocationInfo = self.time_slots.pop(0)
-            time_slot_index, node_id, mobility_phase = time_slot.time_slot_index, time_slot.node_id, time_slot.mobility_phase
-
-            BanSSCS.logger.log(
-                sim_time=self.env.now,
-                msg=f"{self.__class__.__name__}[{self.mac.get_mac_params().node_id}] "
-                    + f"updating Q-table, time slot:{time_slot_index}, node ID: {node_id}, phase: {mobility_phase}",
-                level=logging.DEBUG,
-            )
+        if not self.time_slots:
+            return
 
-            self.q_learning_trainer.train(time_slot_index=time_slot_index, allocated_node_id=node_id, mobility_phase=mobility_phase)
+        BanSSCS.logger.log(
+            sim_time=self.env.now,
+            msg=f"{self.__class__.__name__}[{self.mac.get_mac_params().node_id}] "
+                + f"updating Q-table, time slots: {len(self.time_slots)}",
+            level=logging.DEBUG,
+        )
 
+        # 비콘 하나의 모든 슬롯을 한 번에 학습
+        self.q_learning_trainer.train_batch(
+            time_slot_indices=[time_slot.time_slot_index for time_slot in self.time_slots],
+            allocated_node_ids=[time_slot.node_id for time_slot in self.time_slots],
+            mobility_phases=[time_slot.mobility_phase for time_slot in self.time_slots],
+        )
+        self.time_slots.clear()
 
-    def send_data(self, tx_packet: Packet):
-        tx_params = BanTxParams()
-        tx_params.ban_id = self.tx_params.ban_id
-        tx_params.node_id = self.tx_params.node_id
-        tx_params.recipient_id = self.tx_params.recipient_id
 
-        self.mac.mcps_data_request(self.tx_params, tx_packet)
+    def send_data(self, tx_packet: Packet, priority: int = 0):
+        """
+        :param tx_packet: Packet, the MAC owns it from now on and releases it after ACK or drop
+        :param priority: user priority of the data frame, 0 (UP0, lowest) ~ 7 (UP7, emergency)
+        :return:
+        """
+        self.mac.mcps_data_request(self.tx_params, tx_packet, priority)
 
         # 전송 대기열에 오른 패킷 카운트
         self.mac.get_tracer().requested_packet_count += 1
@@ -347,16 +418,20 @@ class BanSSCS:
             level=logging.DEBUG,
         )
 
-        event = self.env.event()
-        event._ok = True
-        event.callbacks.append(
-            lambda _: self.send_data(tx_packet=tx_packet)
-        )
-        self.env.schedule(event, priority=NORMAL, delay=0.2)
 
+    def set_rx_sink(self, rx_sink: RxSink):
+        self.rx_sink.close()
+        self.rx_sink = rx_sink
+
+    def get_rx_sink(self) -> RxSink:
+        return self.rx_sink
 
     def get_data(self):
-        return self.packet_list
+        return self.rx_sink.get_data()
+
+
+    def get_payload_size(self, priority: int = 0) -> int:
+        return self.payload_sizes[priority]
 
 
     def update_beacon_interval(self):
@@ -396,12 +471,13 @@ class BanSSCS:
 
 
         string = f"Q_TABLE\n[MOVEMENT_PHASE\tTIME_SLOT_INDEX]\t{actions_string}\n"
-        for key in sorted(q_table.keys(), key=lambda x: x.phase.name):
-            values_string = ""
-            for i in q_table[key]:
-                values_string += (f"{i:.3f}" + '\t\t')
+        for phase_index, phase in sorted(enumerate(self.q_learning_trainer.phases), key=lambda x: x[1].name):
+            for slot, values in enumerate(q_table[phase_index]):
+                values_string = ""
+                for i in values:
+                    values_string += (f"{i:.3f}" + '\t\t')
 
-            string += f"{key.phase.name}\t\t\tSLOT_{key.slot}\t\t\t\t{values_string}\n"
+                string += f"{phase.name}\t\t\tSLOT_{slot}\t\t\t\t{values_string}\n"
 
         BanSSCS.logger.log(
             sim_time=self.env.now,
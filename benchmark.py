@@ -0,0 +1,228 @@
+import contextlib
+import gc
+import sys
+import time
+import tracemalloc
+import types
+from dataclasses import dataclass
+
+from ban.base.channel.base_channel import SpectrumSignalParameters
+from ban.base.mobility import MobilityModel, BodyPosition
+from ban.base.packet import Packet, packet_pool
+from ban.base.pool import ObjectPool
+from ban.base.tracer import Tracer
+from ban.device.mac_header import BanFrameType, BanFrameSubType, AssignedLinkElement, BanMacHeader
+from ban.device.sscs import BanTxParams, BanTxOption, TimeSlotAllocationInfo
+from simulation import Simulation
+
+
+'''BENCHMARKS: python benchmark.py pool|memory [simulation time]'''
+
+
+class GCTimer:
+    """accumulates the time spent in the garbage collector through gc.callbacks"""
+    def __init__(self):
+        self.collections = 0
+        self.gc_time = 0.0
+        self.__start = 0.0
+
+    def __call__(self, phase, info):
+        if phase == "start":
+            self.__start = time.perf_counter()
+        else:
+            self.collections += 1
+            self.gc_time += time.perf_counter() - self.__start
+
+    def __enter__(self):
+        gc.collect()
+        gc.callbacks.append(self)
+        return self
+
+    def __exit__(self, *args):
+        gc.callbacks.remove(self)
+
+
+def run_simulation(simulation_time: int):
+    simulation = Simulation(simulation_time=simulation_time)
+    simulation.schedule_send_beacon()
+    simulation.schedule_send_data()
+    simulation.schedule_do_walking()
+    simulation.run()
+
+
+class Unpooled:
+    """
+    the baseline without pools: acquire() builds a new object and release() drops it,
+    so no free list, reset or debug check is paid (a pool with max_size 0 still pays all of them)
+    """
+    def __enter__(self):
+        self.__acquire, self.__release = ObjectPool.acquire, ObjectPool.release
+        self.__packet_acquire = Packet.__dict__["acquire"]
+
+        def acquire(pool: ObjectPool):
+            pool.created_count += 1
+            return pool.factory()
+
+        def packet_acquire(packet_size: int) -> Packet:
+            packet_pool.created_count += 1
+            return Packet(packet_size)
+
+        ObjectPool.acquire = acquire
+        ObjectPool.release = lambda pool, obj: None
+        Packet.acquire = staticmethod(packet_acquire)
+        return self
+
+    def __exit__(self, *args):
+        ObjectPool.acquire, ObjectPool.release = self.__acquire, self.__release
+        Packet.acquire = self.__packet_acquire
+
+
+def measure_packet_cycle(count: int = 100000) -> float:
+    """microseconds of one Packet.acquire() + release()"""
+    start = time.perf_counter()
+    for _ in range(count):
+        Packet.acquire(packet_size=10).release()
+
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def benchmark_pool(simulation_time: int):
+    results = dict()
+
+    for pooled in (False, True):
+        for pool in ObjectPool.pools.values():
+            pool.free_list.clear()
+            pool.created_count = pool.reused_count = pool.released_count = 0
+
+        with (contextlib.nullcontext() if pooled else Unpooled()), GCTimer() as gc_timer:
+            start = time.perf_counter()
+            run_simulation(simulation_time)
+            elapsed = time.perf_counter() - start
+
+            allocations = sum(pool.created_count for pool in ObjectPool.pools.values())
+            packet_cycle_us = measure_packet_cycle()
+
+        results["pooled" if pooled else "unpooled"] = {
+            "allocations": allocations,
+            "gc_collections": gc_timer.collections,
+            "gc_time_ms": round(gc_timer.gc_time * 1000, 3),
+            "elapsed_s": round(elapsed, 3),
+            "packet_cycle_us": round(packet_cycle_us, 3),
+        }
+
+    for name, result in results.items():
+        print(f"{name:>10}: {result}")
+
+
+def measure_bytes(build, count: int = 10000) -> float:
+    """average traced bytes of one object graph returned by build()"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # the list that keeps the objects alive is not part of the records
+    return (after - before - sys.getsizeof(objects)) / count
+
+
+def without_slots(cls, **names):
+    """
+    copy of cls that keeps its attributes in a per-instance __dict__ (the layout before __slots__),
+    names replaces the module globals its methods build other records with
+    """
+    namespace = dict()
+    for key, value in cls.__dict__.items():
+        if key in ("__slots__", "__dict__", "__weakref__") or isinstance(value, types.MemberDescriptorType):
+            continue
+
+        if isinstance(value, types.FunctionType) and names:
+            value = types.FunctionType(
+                value.__code__, {**value.__globals__, **names}, value.__name__, value.__defaults__, value.__closure__
+            )
+
+        namespace[key] = value
+
+    return type(cls.__name__, cls.__bases__, namespace)
+
+
+@dataclass
+class DictFrameControl:
+    # FrameControl before __slots__: only 3 annotated fields, the others are class attributes until assigned
+    version = None
+    ack_policy = None
+    sec_level = None
+    tk_index = None
+    relay = None
+    ack_timing = None
+    frame_subtype = None
+    frame_type: BanFrameType = None
+    frame_type_code: int = None
+    frame_subtype_code: int = None
+    more_data = None
+    last_frame = None
+    sequence_number = None
+    frag_number = None
+    non_final_frag = None
+    reserved = None
+
+
+DictMacHeader = without_slots(BanMacHeader, FrameControl=DictFrameControl)
+DictPacket = without_slots(
+    Packet, BanMacHeader=DictMacHeader, SpectrumSignalParameters=without_slots(SpectrumSignalParameters)
+)
+
+SLOTS_LAYOUT = {
+    "packet": Packet, "tracer": Tracer, "mobility": MobilityModel, "tx_params": BanTxParams,
+    "slot_allocation": TimeSlotAllocationInfo, "link_element": AssignedLinkElement,
+}
+DICT_LAYOUT = {
+    "packet": DictPacket, "tracer": without_slots(Tracer), "mobility": without_slots(MobilityModel),
+    "tx_params": without_slots(BanTxParams), "slot_allocation": without_slots(TimeSlotAllocationInfo),
+    "link_element": without_slots(AssignedLinkElement),
+}
+
+
+def build_frame(layout: dict = SLOTS_LAYOUT) -> Packet:
+    # a data frame as it is sent: packet, mac header, frame control and spectrum parameters
+    packet = layout["packet"](packet_size=10)
+    packet.get_mac_header().set_tx_params(0, 1, 99, 0)
+    packet.get_mac_header().set_frame_control(
+        BanFrameType.IEEE_802_15_6_MAC_DATA, BanFrameSubType.WBAN_DATA_UP0, BanTxOption.TX_OPTION_ACK, 0
+    )
+    packet.get_spectrum_tx_params().duration = 0.0001
+    packet.get_spectrum_tx_params().tx_power = 0.0
+    packet.set_success(True)
+
+    return packet
+
+
+def build_node_records(layout: dict = SLOTS_LAYOUT) -> tuple:
+    # the per-node records: tracer, mobility model, tx parameters, one slot assignment and its beacon link element
+    return (
+        layout["tracer"](),
+        layout["mobility"](BodyPosition.LEFT_WRIST),
+        layout["tx_params"](0, 1, 99),
+        layout["slot_allocation"](time_slot_index=0, node_id=1),
+        layout["link_element"](allocation_id=1, interval_start=0, interval_end=1, tx_power=0.0, time_slot_index=0),
+    )
+
+
+def benchmark_memory():
+    # dict: the same records with a per-instance __dict__, the reference for the __slots__ layout
+    for name, layout in (("dict", DICT_LAYOUT), ("slots", SLOTS_LAYOUT)):
+        print(f"{name:>5} bytes per frame: {measure_bytes(lambda: build_frame(layout)):.1f}")
+        print(f"{name:>5} bytes per node : {measure_bytes(lambda: build_node_records(layout)):.1f}")
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "pool"
+    sim_time = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    if mode == "pool":
+        benchmark_pool(sim_time)
+    elif mode == "memory":
+        benchmark_memory()
+    else:
+        print(f"unknown benchmark: {mode}")
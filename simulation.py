@@ -6,10 +6,11 @@ from ban.base.channel.channel import Channel
 from ban.base.helper.mobility_helper import MobilityHelper
 from ban.base.mobility import MobilityModel, BodyPosition
 from ban.base.packet import Packet
+from ban.base.pool import ObjectPool
 from ban.base.q_learning.q_learning_trainer import QLearningTrainer
 from ban.base.tracer import Tracer
+from ban.base.traffic import TrafficScheduler, create_traffic_generator
 from ban.config.JSONConfig import JSONConfig
-from ban.device.mac_header import BanMacHeader
 from ban.device.node import NodeBuilder, Node
 from ban.device.sscs import BanSSCS, BanTxParams
 
@@ -35,6 +36,7 @@ class Simulation:
             use_q_learning: bool = True,
             time_slots: int = 8,
             coordinator_id: int = 99,
+            q_table_file: str | None = None,
             ):
         
         self.NODE_COUNT = node_count
@@ -44,10 +46,14 @@ class Simulation:
         self.priority_wight = priority_weight
 
 
+        # detect packets and parameter objects that are used after being released to their pool
+        ObjectPool.set_debug(bool(JSONConfig.get_config("object_pool_debug")))
+
         self.env: simpy.Environment = simpy.Environment()
         self.mobility_helper: MobilityHelper = MobilityHelper(self.env)
         self.channel = Channel(self.mobility_helper)
         self.channel.set_env(self.env)
+        self.traffic_scheduler = TrafficScheduler(self.env)
 
         # Create node containers
         self.nodes: list[Node] = [
@@ -89,6 +95,10 @@ class Simulation:
         if not use_q_learning:
             self.agent.m_sscs.q_learning_trainer.turn_off()
 
+        # warm-start: continue from a Q-table saved by an earlier run
+        if q_table_file is not None:
+            self.agent.m_sscs.q_learning_trainer.load_q_table(q_table_file)
+
     def set_q_learning_parameter(self, learning_rate: float, discount_factor: float, exploration_rate: float):
         trainer: QLearningTrainer = self.agent.m_sscs.q_learning_trainer
 
@@ -96,6 +106,9 @@ class Simulation:
         trainer.discount_factor = discount_factor
         trainer.exploration_rate = exploration_rate
 
+    def save_q_table(self, file_path: str):
+        self.agent.m_sscs.q_learning_trainer.save_q_table(file_path)
+
     def get_coor_sscs(self, mobility_helper: MobilityHelper, tracers: list[Tracer]):
         sscs = BanSSCS(
             node_count=self.NODE_COUNT,
@@ -107,14 +120,13 @@ class Simulation:
         return sscs
     
 
-    def send_data(self, env):
-        for node in self.nodes:
-            packet: Packet = Packet(packet_size=int(JSONConfig.get_config("packet_size")))
-            mac_header = BanMacHeader()
-            mac_header.set_tx_params(ban_id=0, sender_id=node.m_tx_params.node_id, recipient_id=self.COORDINATOR_ID)
+    def send_data(self, node: Node, priority: int = 0):
+        packet: Packet = Packet.acquire(packet_size=node.m_sscs.get_payload_size(priority=priority))
+        packet.get_mac_header().set_tx_params(
+            ban_id=0, sender_id=node.m_tx_params.node_id, recipient_id=self.COORDINATOR_ID
+        )
 
-            packet.set_mac_header_(mac_header=mac_header)
-            node.m_sscs.send_data(packet)
+        node.m_sscs.send_data(packet, priority)
 
     def schedule_send_beacon(self, delay: float=0):
         event = self.env.event()
@@ -129,10 +141,12 @@ class Simulation:
         self.env.schedule(event, priority=NORMAL, delay=delay)
 
     def schedule_send_data(self, delay: float = 0.0002):
-        event = self.env.event()
-        event._ok = True
-        event.callbacks.append(self.send_data)
-        self.env.schedule(event, priority=NORMAL, delay=delay)
+        # 노드별 트래픽 모델의 도착 시각을 하나의 heap 으로 관리
+        for node in self.nodes:
+            generator = create_traffic_generator(node.m_tx_params.node_id, start=self.env.now + delay)
+            self.traffic_scheduler.add_source(generator, lambda priority, node=node: self.send_data(node, priority))
+
+        self.traffic_scheduler.start()
 
     def schedule_show_result(self):
         event = self.env.event()
@@ -168,6 +182,7 @@ class Simulation:
 
     def run(self):
         self.env.run(until=self.SIMULATION_TIME)
+        self.agent.m_sscs.get_rx_sink().close()
 
 
 if __name__ == "__main__":
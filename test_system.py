@@ -11,8 +11,8 @@ from ban.base.helper.mobility_helper import MobilityHelper
 from ban.base.mobility import MobilityModel, BodyPosition
 from ban.base.packet import Packet
 from ban.base.tracer import Tracer
+from ban.base.traffic import TrafficScheduler, create_traffic_generator
 from ban.config.JSONConfig import JSONConfig
-from ban.device.mac_header import BanMacHeader
 from ban.device.node import NodeBuilder, Node
 from ban.device.sscs import BanSSCS, BanTxParams
 
@@ -109,14 +109,11 @@ if not use_q_learning:
 
 
 '''GENERATE EVENTS'''
-def send_data(env):
-    for node in nodes:
-        packet: Packet = Packet(packet_size=int(JSONConfig.get_config("packet_size")))
-        mac_header = BanMacHeader()
-        mac_header.set_tx_params(ban_id=0, sender_id=node.m_tx_params.node_id, recipient_id=COORDINATOR_ID)
+def send_data(node: Node, priority: int = 0):
+    packet: Packet = Packet.acquire(packet_size=node.m_sscs.get_payload_size(priority=priority))
+    packet.get_mac_header().set_tx_params(ban_id=0, sender_id=node.m_tx_params.node_id, recipient_id=COORDINATOR_ID)
 
-        packet.set_mac_header_(mac_header=mac_header)
-        node.m_sscs.send_data(packet)
+    node.m_sscs.send_data(packet, priority)
 
 '''do_walking event'''
 event = env.event()
@@ -131,11 +128,14 @@ event.callbacks.append(lambda _: agent.m_sscs.send_beacon(event=env))
 env.schedule(event, priority=NORMAL, delay=0)
 
 '''send_data event'''
+# BanSSCS.send_data sends one packet, the traffic model of each node (config "traffic_*") decides when
 delay = 0.0001
-event = env.event()
-event._ok = True
-event.callbacks.append(send_data)
-env.schedule(event, priority=NORMAL, delay=delay)
+traffic_scheduler = TrafficScheduler(env)
+for node in nodes:
+    generator = create_traffic_generator(node.m_tx_params.node_id, start=env.now + delay)
+    traffic_scheduler.add_source(generator, lambda priority, node=node: send_data(node, priority))
+
+traffic_scheduler.start()
 
 
 '''show result event'''
@@ -0,0 +1,44 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ban.config.JSONConfig import JSONConfig
+
+# the simulator reads ./config.json, tests use the one of the repository wherever pytest is started
+JSONConfig.load_config(os.path.join(ROOT, "config.json"))
+
+import pytest
+import simpy
+
+
+class StubTracer:
+    """records what the PHY and the TX queue report to the tracer of their MAC"""
+    def __init__(self):
+        self.trx_states: list = []
+        self.drops: list[bool] = []
+        self.latencies: list[tuple[int, float]] = []
+        self.length = 0
+
+    def change_trx_state(self, state, power: float):
+        self.trx_states.append(state)
+
+    def update_queue_length(self, length: int):
+        self.length = length
+
+    def add_queue_drop(self, expired: bool):
+        self.drops.append(expired)
+
+    def add_queue_latency(self, priority: int, latency: float):
+        self.latencies.append((priority, latency))
+
+
+@pytest.fixture
+def env() -> simpy.Environment:
+    return simpy.Environment()
+
+
+@pytest.fixture
+def tracer() -> StubTracer:
+    return StubTracer()
@@ -0,0 +1,57 @@
+import pytest
+
+from ban.base.channel.channel import Channel
+
+
+class StubPhy:
+    def __init__(self, threshold: float = -100.0):
+        self.threshold = threshold
+
+    def get_mobility(self):
+        return None
+
+    def senses(self, rx_power: float) -> bool:
+        return rx_power >= self.threshold
+
+
+@pytest.fixture
+def channel(env) -> Channel:
+    channel = Channel(mob_helper=None)
+    channel.set_env(env)
+    return channel
+
+
+def test_is_idle_without_receiver_sees_every_transmission(channel):
+    channel.add_busy_interval(1.0, 2.0, StubPhy(), 0.0)
+
+    assert channel.is_idle(0.0, 1.0)
+    assert not channel.is_idle(1.5, 1.6)
+    assert channel.is_idle(2.0, 3.0)
+
+
+def test_is_idle_filters_frames_that_do_not_reach_the_receiver(channel):
+    sender, listener, deaf = StubPhy(), StubPhy(), StubPhy()
+
+    receivers = channel.add_busy_interval(1.0, 2.0, sender, 0.0)
+
+    # before the interval starts its receivers are unknown, the frame keeps every other PHY busy
+    assert not channel.is_idle(1.5, 1.6, receiver=deaf)
+    assert channel.is_idle(1.5, 1.6, receiver=sender)
+
+    # start_tx reached only the listener (the deaf PHY was off or its link was blocked)
+    receivers[listener] = -50.0
+    channel.get_env().run(until=1.5)
+
+    assert not channel.is_idle(1.5, 1.6, receiver=listener)
+    assert channel.is_idle(1.5, 1.6, receiver=deaf)
+    assert channel.is_idle(1.5, 1.6, receiver=sender)
+
+
+def test_is_idle_ignores_frames_below_the_cca_threshold(channel):
+    sender, weak_listener = StubPhy(), StubPhy(threshold=-40.0)
+
+    receivers = channel.add_busy_interval(1.0, 2.0, sender, 0.0)
+    receivers[weak_listener] = -50.0
+    channel.get_env().run(until=1.5)
+
+    assert channel.is_idle(1.5, 1.6, receiver=weak_listener)
@@ -0,0 +1,28 @@
+import pytest
+
+from ban.base.channel.csma_ca import BanSuperframe
+
+
+@pytest.fixture
+def superframe() -> BanSuperframe:
+    """RAP from 1 s to 2 s after the beacon, 0.1 s backoff slots"""
+    return BanSuperframe(beacon_time=0.0, rap_start=1.0, rap_end=2.0, backoff_slot=0.1)
+
+
+def test_time_before_the_rap_waits_for_its_start(superframe):
+    assert superframe.get_time_to_next_boundary(0.25) == pytest.approx(0.75)
+
+
+def test_time_on_a_boundary_needs_no_wait(superframe):
+    assert superframe.get_time_to_next_boundary(1.0) == 0.0
+    assert superframe.get_time_to_next_boundary(1.3) == pytest.approx(0.0, abs=1e-9)
+
+
+def test_time_between_boundaries_waits_for_the_next_one(superframe):
+    assert superframe.get_time_to_next_boundary(1.25) == pytest.approx(0.05)
+
+
+def test_a_transaction_must_fit_inside_the_rap(superframe):
+    assert superframe.fits_before_rap_end(1.0, 1.0)
+    assert not superframe.fits_before_rap_end(1.5, 0.6)
+    assert not superframe.fits_before_rap_end(0.9, 0.1)
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+import simpy
+
+from ban.base.channel.channel import Channel
+from ban.base.channel.error_model import BanErrorModel, BanModulation
+from ban.config.JSONConfig import JSONConfig
+from ban.device.phy import NOISE, NOISE_FLOOR
+
+
+def loss_ratio(sinr_db: float, packet_size: int = 10, trials: int = 4000) -> float:
+    error_model = BanErrorModel(BanModulation.OQPSK, seed=1)
+    return 1.0 - sum(error_model.is_received(sinr_db, packet_size) for _ in range(trials)) / trials
+
+
+def test_per_is_monotonic_in_sinr():
+    per = BanErrorModel.get_per_table(BanModulation.OQPSK, 10)[0]
+    assert np.all(np.diff(per) <= 0)
+
+
+def test_partial_losses_near_sensitivity():
+    sensitivity_sinr = -82 - NOISE_FLOOR
+    assert 0.01 < loss_ratio(sensitivity_sinr) < 0.5
+    assert loss_ratio(sensitivity_sinr + 15) == 0.0
+    assert loss_ratio(0.0) > 0.9
+
+
+class StubPhy:
+    def get_mobility(self):
+        return None
+
+
+def test_interference_from_other_senders_only():
+    channel = Channel(mob_helper=None)
+    channel.set_env(simpy.Environment())
+    channel.set_loss_model(None)
+
+    sender, interferer, receiver = StubPhy(), StubPhy(), StubPhy()
+    channel.add_busy_interval(0.0, 1.0, sender, 0.0)
+    channel.add_busy_interval(0.5, 1.5, interferer, -10.0)
+    channel.add_busy_interval(2.0, 3.0, interferer, 0.0)
+
+    assert channel.get_interference_power(receiver, sender, 0.0, 1.0) == pytest.approx(0.1)
+    assert channel.get_interference_power(receiver, interferer, 0.5, 1.5) == pytest.approx(1.0)
+    assert channel.get_interference_power(receiver, sender, 1.5, 2.0) == 0.0
+
+
+def run_simulation(monkeypatch, simulation_time: int, **config):
+    for key, value in config.items():
+        monkeypatch.setitem(JSONConfig.configuration, key, value)
+
+    from simulation import Simulation
+    simulation = Simulation(simulation_time=simulation_time, use_q_learning=False)
+    simulation.schedule_send_beacon()
+    simulation.schedule_send_data()
+    simulation.schedule_do_walking()
+    simulation.run()
+
+    return [node.get_mac().get_tracer() for node in simulation.nodes]
+
+
+def test_low_tx_power_loses_part_of_the_frames(monkeypatch):
+    results = []
+    is_received = BanErrorModel.is_received
+
+    def record(error_model, sinr_db, packet_size):
+        results.append(is_received(error_model, sinr_db, packet_size))
+        return results[-1]
+
+    monkeypatch.setattr(BanErrorModel, "is_received", record)
+    run_simulation(monkeypatch, 20, tx_power=-14)
+
+    # the PER curve, not only the sensitivity cutoff, drops a part of the detected frames
+    assert 0 < results.count(False) < len(results)
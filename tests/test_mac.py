@@ -0,0 +1,64 @@
+import pytest
+
+from ban.base.packet import Packet, packet_pool
+from ban.base.pool import ObjectPool, UseAfterReleaseError
+from ban.device.sscs import BanDataConfirmStatus
+
+
+@pytest.fixture
+def node(monkeypatch):
+    from simulation import Simulation
+    simulation = Simulation(simulation_time=1, use_q_learning=False)
+
+    # after the simulation, which sets the pool mode from the configuration
+    # packets released by earlier tests are not poisoned, start from an empty free list
+    monkeypatch.setattr(ObjectPool, "debug", True)
+    monkeypatch.setattr(packet_pool, "free_list", [])
+    return simulation.nodes[0]
+
+
+@pytest.mark.parametrize("priority", [-1, 8])
+def test_data_request_rejects_priority_outside_up0_to_up7(node, monkeypatch, priority):
+    confirms = []
+    monkeypatch.setattr(node.m_sscs, "data_confirm", lambda status, *args: confirms.append(status))
+
+    mac = node.get_mac()
+    queued = len(mac.tx_queue)
+    packet = Packet.acquire(packet_size=10)
+    packet.get_mac_header().set_tx_params(ban_id=0, sender_id=node.m_tx_params.node_id, recipient_id=99)
+
+    mac.mcps_data_request(node.m_tx_params, packet, priority)
+
+    assert confirms == [BanDataConfirmStatus.IEEE_802_15_6_INVALID_PARAMETER]
+    assert len(mac.tx_queue) == queued
+    with pytest.raises(UseAfterReleaseError):
+        packet.get_size()
+
+
+def test_traffic_priority_outside_up0_to_up7_is_a_configuration_error(monkeypatch):
+    from ban.base.traffic import create_traffic_generator
+    from ban.config.JSONConfig import JSONConfig
+
+    monkeypatch.setitem(JSONConfig.configuration, "traffic_priority", 8)
+
+    with pytest.raises(ValueError):
+        create_traffic_generator(node_id=0)
+
+
+def test_a_mid_size_frame_is_retransmitted_in_its_slot(monkeypatch):
+    from ban.config.JSONConfig import JSONConfig
+    from simulation import Simulation
+
+    # 60 byte payloads on a weak link: frames are lost, the ACK timeout leaves room for a retry in the slot
+    for key, value in {"payload_sizes": [60] * 8, "tx_power": -14, "mac_max_frame_retries": 3}.items():
+        monkeypatch.setitem(JSONConfig.configuration, key, value)
+
+    simulation = Simulation(simulation_time=10, use_q_learning=False)
+    simulation.schedule_send_beacon()
+    simulation.schedule_send_data()
+    simulation.schedule_do_walking()
+    simulation.run()
+
+    tracers = [node.get_mac().get_tracer() for node in simulation.nodes]
+    assert sum(tracer.retry_count for tracer in tracers) > 0
+    assert sum(tracer.total_success_tx_packet for tracer in tracers) > 0
@@ -0,0 +1,22 @@
+import pytest
+
+from ban.device.mac_header import BlockAck
+
+
+@pytest.fixture
+def block_ack(request) -> BlockAck:
+    """a BlockAck with the (start sequence, bitmap) given by indirect parametrization"""
+    block_ack = BlockAck()
+    block_ack.start_seq, block_ack.bitmap = request.param
+    return block_ack
+
+
+@pytest.mark.parametrize("block_ack", [(10, 0b1011)], indirect=True)
+def test_bitmap_is_relative_to_the_start_sequence(block_ack):
+    assert [block_ack.is_acknowledged(seq) for seq in range(10, 15)] == [True, True, False, True, False]
+
+
+@pytest.mark.parametrize("block_ack", [(10, 0b1111)], indirect=True)
+def test_sequence_numbers_before_the_start_are_not_acknowledged(block_ack):
+    assert not block_ack.is_acknowledged(9)
+    assert not block_ack.is_acknowledged(0)
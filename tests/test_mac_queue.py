@@ -0,0 +1,96 @@
+import pytest
+import simpy
+
+from ban.base.packet import Packet
+from ban.device.mac_queue import BanTxQueue, BanQueueDropPolicy
+
+
+@pytest.fixture
+def dropped() -> list:
+    """(packet, expired) of every packet handed to the drop handler"""
+    return []
+
+
+@pytest.fixture
+def queue(request, env, tracer, dropped) -> BanTxQueue:
+    """a TX queue built with the keyword arguments given by indirect parametrization"""
+    queue = BanTxQueue(**getattr(request, "param", {}))
+    queue.set_env(env)
+    queue.set_tracer(tracer)
+    queue.set_drop_handler(lambda packet, expired: dropped.append((packet, expired)))
+    return queue
+
+
+def advance(env: simpy.Environment, time: float):
+    env.run(until=env.now + time)
+
+
+def test_strict_priority_and_fifo_within_a_priority(queue, tracer):
+    low_1, low_2, high = Packet(10), Packet(10), Packet(10)
+
+    queue.put_nowait(low_1, 0)
+    queue.put_nowait(low_2, 0)
+    queue.put_nowait(high, 7)
+
+    assert len(queue) == 3
+    assert queue.peek() is high
+    assert [queue.get_nowait() for _ in range(3)] == [high, low_1, low_2]
+    assert queue.get_nowait() is None
+    assert queue.empty()
+    assert tracer.length == 0
+
+
+@pytest.mark.parametrize("queue", [dict(capacity=2)], indirect=True)
+def test_tail_drop_rejects_the_arriving_packet(queue, tracer, dropped):
+    packets = [Packet(10) for _ in range(3)]
+
+    assert [queue.put_nowait(packet, 1) for packet in packets] == [True, True, False]
+    assert queue.get_length(1) == 2
+    assert tracer.drops == [False]
+    # the caller keeps the rejected packet, nothing went to the drop handler
+    assert dropped == []
+    assert queue.get_nowait() is packets[0]
+
+
+@pytest.mark.parametrize("queue", [dict(capacity=1)], indirect=True)
+def test_capacity_is_per_priority(queue):
+    assert queue.put_nowait(Packet(10), 0)
+    assert queue.put_nowait(Packet(10), 1)
+    assert not queue.put_nowait(Packet(10), 0)
+
+
+@pytest.mark.parametrize("queue", [dict(capacity=2, drop_policy=BanQueueDropPolicy.HEAD_DROP)], indirect=True)
+def test_head_drop_evicts_the_oldest_packet(queue, dropped):
+    packets = [Packet(10) for _ in range(3)]
+
+    assert all(queue.put_nowait(packet, 3) for packet in packets)
+    assert dropped == [(packets[0], False)]
+    assert [queue.get_nowait(), queue.get_nowait()] == packets[1:]
+    assert len(queue) == 0
+
+
+@pytest.mark.parametrize("queue", [dict(drop_policy=BanQueueDropPolicy.EXPIRE, max_age=1.0)], indirect=True)
+def test_expire_drops_old_packets_on_dequeue(queue, env, tracer, dropped):
+    old, fresh = Packet(10), Packet(10)
+
+    queue.put_nowait(old, 2)
+    advance(env, 0.8)
+    queue.put_nowait(fresh, 2)
+    advance(env, 0.5)
+
+    assert queue.get_nowait() is fresh
+    assert dropped == [(old, True)]
+    assert tracer.drops == [True]
+    assert tracer.latencies == [(2, 0.5)]
+
+
+@pytest.mark.parametrize("queue", [dict(capacity=1, drop_policy=BanQueueDropPolicy.EXPIRE, max_age=1.0)], indirect=True)
+def test_expire_makes_room_before_tail_drop(queue, env, dropped):
+    old, new = Packet(10), Packet(10)
+
+    queue.put_nowait(old, 0)
+    advance(env, 2.0)
+
+    assert queue.put_nowait(new, 0)
+    assert dropped == [(old, True)]
+    assert queue.get_nowait() is new
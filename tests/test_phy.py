@@ -0,0 +1,86 @@
+import pytest
+
+from ban.device.phy import BanPhy, BanPhyTRxState
+
+# states the transceiver can be in, the other values are request statuses
+STATES = tuple(BanPhy.trx_state_power)
+BUSY_TX = BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_TX
+BUSY_RX = BanPhyTRxState.IEEE_802_15_6_PHY_BUSY_RX
+TX_ON = BanPhyTRxState.IEEE_802_15_6_PHY_TX_ON
+
+
+class StubMac:
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self.confirms: list[BanPhyTRxState] = []
+
+    def get_tracer(self):
+        return self.tracer
+
+    def set_trx_state_confirm(self, status: BanPhyTRxState):
+        self.confirms.append(status)
+
+
+@pytest.fixture
+def mac(tracer) -> StubMac:
+    return StubMac(tracer)
+
+
+@pytest.fixture
+def phy(request, mac) -> BanPhy:
+    """a PHY in the state given by indirect parametrization (RX_ON by default)"""
+    phy = BanPhy()
+    phy.set_mac(mac)
+    phy.change_trx_state(getattr(request, "param", BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON))
+    return phy
+
+
+@pytest.mark.parametrize("phy, requested", [(c, r) for c in STATES for r in STATES], indirect=["phy"])
+def test_every_request_is_confirmed_once_or_ignored(phy, mac, requested):
+    current = phy.get_trx_state()
+    transition = BanPhy.trx_state_transitions.get((current, requested))
+
+    phy.set_trx_state_request(requested)
+
+    if transition is None:
+        assert mac.confirms == []
+        assert phy.get_trx_state() == current
+    else:
+        assert mac.confirms == [transition.confirm]
+        assert phy.get_trx_state() == (current if transition.next_state is None else transition.next_state)
+        assert phy.get_trx_transition_count()[(current, requested)] == 1
+
+
+@pytest.mark.parametrize("phy", STATES, indirect=True)
+def test_requesting_the_current_state_only_reports_it(phy, mac, tracer):
+    state = phy.get_trx_state()
+    phy.set_trx_state_request(state)
+
+    assert mac.confirms == [state]
+    assert phy.get_trx_state() == state
+    assert tracer.trx_states == [state]
+
+
+@pytest.mark.parametrize("phy", [BUSY_TX], indirect=True)
+def test_tx_on_during_a_transmission_keeps_it_running(phy, mac):
+    phy.set_trx_state_request(TX_ON)
+
+    assert mac.confirms == [TX_ON]
+    assert phy.get_trx_state() == BUSY_TX
+
+
+@pytest.mark.parametrize("phy", [BUSY_TX], indirect=True)
+@pytest.mark.parametrize("requested", [BanPhyTRxState.IEEE_802_15_6_PHY_RX_ON, BanPhyTRxState.IEEE_802_15_6_PHY_TRX_OFF])
+def test_the_mac_leaves_busy_tx_with_rx_on_or_trx_off(phy, mac, requested):
+    phy.set_trx_state_request(requested)
+
+    assert mac.confirms == [requested]
+    assert phy.get_trx_state() == requested
+
+
+@pytest.mark.parametrize("phy", [BUSY_RX], indirect=True)
+def test_busy_rx_to_tx_on_discards_the_reception(phy, tracer):
+    phy.set_trx_state_request(TX_ON)
+
+    assert phy.get_trx_state() == TX_ON
+    assert tracer.trx_states == [BUSY_RX, TX_ON]
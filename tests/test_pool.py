@@ -0,0 +1,93 @@
+import pytest
+
+from ban.base.pool import ObjectPool, UseAfterReleaseError
+
+
+class Item:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+
+def reset_item(item: Item):
+    item.value = 0
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(ObjectPool, "debug", True)
+    pool = ObjectPool("test-item", Item, reset_item, max_size=4)
+    yield pool
+    ObjectPool.pools.pop("test-item", None)
+
+
+def test_released_objects_are_reused_and_reset(pool):
+    item = pool.acquire()
+    item.value = 5
+    pool.release(item)
+
+    again = pool.acquire()
+    assert again is item
+    assert again.value == 0
+    assert pool.get_stats() == {"created": 1, "reused": 1, "released": 1, "free": 0}
+
+
+def test_use_after_release_is_detected(pool):
+    item = pool.acquire()
+    pool.release(item)
+
+    with pytest.raises(UseAfterReleaseError):
+        _ = item.value
+    with pytest.raises(UseAfterReleaseError):
+        item.value = 1
+
+
+def test_double_release_is_detected(pool):
+    item = pool.acquire()
+    pool.release(item)
+
+    with pytest.raises(UseAfterReleaseError):
+        pool.release(item)
+
+
+def test_free_list_is_bounded(pool):
+    items = [pool.acquire() for _ in range(6)]
+    for item in items:
+        pool.release(item)
+
+    assert pool.get_stats()["free"] == 4
+
+
+def test_a_recycled_packet_is_reset_and_a_copy_is_independent(monkeypatch):
+    from ban.base.packet import Packet, packet_pool
+    from ban.device.mac_header import BanFrameType, BanFrameSubType, DATA_BODIES
+
+    monkeypatch.setattr(packet_pool, "free_list", [])
+
+    packet = Packet.acquire(packet_size=10)
+    packet.get_mac_header().set_tx_params(0, 1, 99, 3)
+    packet.get_mac_header().set_frame_control(
+        BanFrameType.IEEE_802_15_6_MAC_DATA, BanFrameSubType.WBAN_DATA_UP2, 1, 7
+    )
+    packet.get_mac_header().get_frame_control().frag_number = 2
+    packet.get_spectrum_tx_params().tx_power = -5.0
+    packet.set_frame_body(DATA_BODIES[2])
+
+    copy = packet.copy()
+    packet.release()
+
+    # the copy is built on a pooled packet without a reset, every field comes from the original
+    assert copy.get_mac_header().get_frame_control().sequence_number == 7
+    assert copy.get_mac_header().get_frame_control().frag_number == 2
+    assert copy.get_mac_header().time_slot_index == 3
+    assert copy.get_spectrum_tx_params().tx_power == -5.0
+
+    recycled = Packet.acquire(packet_size=20)
+    assert recycled is packet
+    assert recycled.get_size() == 20
+    assert recycled.get_mac_header().get_frame_control() == type(recycled.get_mac_header().get_frame_control())()
+    assert recycled.get_mac_header().sender_id is None
+    assert recycled.get_spectrum_tx_params().tx_power is None
+    copy.release()
+    recycled.release()
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from ban.base.traffic import OnOffTraffic, TraceTraffic, TrafficGenerator
+
+
+def arrivals(generator: TrafficGenerator, count: int) -> np.ndarray:
+    return np.array([generator.next_arrival() for _ in range(count)])
+
+
+def test_a_generator_must_draw_intervals():
+    with pytest.raises(TypeError):
+        TrafficGenerator(np.random.default_rng(0))
+
+
+def test_trace_replays_the_sorted_times_from_start_and_ends():
+    trace = TraceTraffic(np.random.default_rng(0), np.array([0.5, 0.1, 2.0, 2.0]), start=10.0)
+
+    assert arrivals(trace, 4) == pytest.approx([10.1, 10.5, 12.0, 12.0])
+    assert trace.next_arrival() is None
+
+
+@pytest.mark.parametrize("block_size", [4, TrafficGenerator.BLOCK_SIZE])
+def test_on_off_bursts_go_on_across_blocks(monkeypatch, block_size):
+    monkeypatch.setattr(TrafficGenerator, "BLOCK_SIZE", block_size)
+
+    # mean burst of 20 packets, off periods long enough to tell the bursts apart
+    generator = OnOffTraffic(np.random.default_rng(3), period=0.1, on_time=2.0, off_time=100.0)
+    gaps = np.diff(arrivals(generator, 20000))
+
+    burst_count = 1 + np.count_nonzero(gaps > 0.15)
+    assert 20000 / burst_count == pytest.approx(20.0, rel=0.15)
@@ -10,8 +10,7 @@ from ban.base.dqn.dqn_trainer import DQNTrainer
 from ban.base.helper.mobility_helper import MobilityHelper
 from ban.base.mobility import BodyPosition, MobilityModel
 from ban.base.packet import Packet
-from ban.config.JSONConfig import JSONConfig
-from ban.device.mac_header import BanMacHeader
+from ban.base.traffic import TrafficScheduler, create_traffic_generator
 from ban.device.node import NodeBuilder, Node
 from ban.device.sscs import BanTxParams, BanSSCS
 
@@ -73,35 +72,23 @@ ev._ok = True
 ev.callbacks.append(lambda _: agent.m_sscs.send_beacon(event=None, pbar=pbar))
 agent.env.schedule(ev, priority=0, delay=0)
 
-packet: Packet = Packet(packet_size=int(JSONConfig.get_config("packet_size")))
-mac_header = BanMacHeader()
-mac_header.set_tx_params(ban_id=0, sender_id=1, recipient_id=0)
-
-packet.set_mac_header_(mac_header=mac_header)
-
 ev = env.event()
 ev._ok = True
 ev.callbacks.append(mobility_helper.do_walking)
 env.schedule(ev, priority=0, delay=0)
 
-packet: Packet = Packet(packet_size=10)
-mac_header = BanMacHeader()
-mac_header.set_tx_params(ban_id=0, sender_id=1, recipient_id=0)
-
-packet.set_mac_header_(mac_header=mac_header)
 
-event = device.env.event()
-event._ok = True
+def send_data(priority: int = 0):
+    packet: Packet = Packet.acquire(packet_size=device.m_sscs.get_payload_size(priority=priority))
+    packet.get_mac_header().set_tx_params(ban_id=0, sender_id=1, recipient_id=0)
 
-event.callbacks.append(
-    lambda _: device.m_sscs.send_data(tx_packet=packet)
-)
+    device.m_sscs.send_data(packet, priority)
 
-# event.callbacks.append(
-#     lambda _: device.get_mac().show_result(pbar=pbar, delay_interval=show_result_delay_interval)
-# )
 
-device.env.schedule(event, priority=0, delay=0.1)
+# BanSSCS.send_data sends one packet, the traffic model of the device (config "traffic_*") decides when
+traffic_scheduler = TrafficScheduler(env)
+traffic_scheduler.add_source(create_traffic_generator(node_id=1, start=0.1), send_data)
+traffic_scheduler.start()
 
 # event = env.event()
 # event._ok = True